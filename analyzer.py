@@ -0,0 +1,399 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+load_dotenv()
+
+from cache import CACHE_DIR, DiskCache, hash_key
+from http_client import OPENAI_API_KEY, get_openai_client, record_timing
+from json_diff import diff
+from json_stream import SectionStreamParser
+from metrics import COUNT_BUCKETS, increment, observe, span
+from prompt import EMBEDDING_MODEL, PROMPT_MAX_EXPERIENCE, PROMPT_TOKEN_BUDGET, compact_prompt, count_tokens
+
+# --- Configuration ---
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Bump whenever build_prompt changes so stale cached responses are not reused
+PROMPT_VERSION = 3
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+RESPONSE_CACHE_MAX_AGE = float(os.getenv("RESPONSE_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600
+RESPONSE_CACHE_BYPASS = os.getenv("RESPONSE_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+class AnalysisError(Exception):
+    """Raised when a resume cannot be tailored to a job description."""
+
+
+class MissingAPIKeyError(AnalysisError):
+    """Raised when the OpenAI API key is not configured."""
+
+
+class AnalysisCancelled(AnalysisError):
+    """Raised when a streaming analysis is cancelled before it completes."""
+
+
+def check_api_key():
+    """Raises MissingAPIKeyError if the OpenAI API key is not configured."""
+    if not OPENAI_API_KEY or OPENAI_API_KEY == "YOUR_OPENAI_API_KEY":
+        raise MissingAPIKeyError("Please set your OpenAI API key in the script.")
+
+
+def get_response_cache():
+    """Returns the shared on-disk response cache, creating it on first use."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = DiskCache(
+                os.path.join(CACHE_DIR, "responses"),
+                max_bytes=RESPONSE_CACHE_MAX_BYTES,
+                max_age=RESPONSE_CACHE_MAX_AGE,
+                suffix=".json"
+            )
+            atexit.register(_response_cache.flush)
+        return _response_cache
+
+
+def normalize_json(value):
+    """Collapses whitespace in every string of a JSON value so cosmetic edits share a key."""
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip()
+    if isinstance(value, list):
+        return [normalize_json(v) for v in value]
+    if isinstance(value, dict):
+        return {k: normalize_json(v) for k, v in value.items()}
+    return value
+
+
+def response_cache_key(summary, experience, skills, job_description, model=None):
+    """Returns the cache key for an analysis request."""
+    return hash_key(
+        normalize_json(summary),
+        normalize_json(experience),
+        normalize_json(skills),
+        normalize_json(job_description),
+        model or OPENAI_MODEL,
+        PROMPT_VERSION,
+        PROMPT_TOKEN_BUDGET,
+        PROMPT_MAX_EXPERIENCE,
+        EMBEDDING_MODEL
+    )
+
+
+def build_prompt(summary, experience, skills, job_description):
+    """Builds the tailoring prompt for the given resume sections and job description."""
+    return f"""
+            You are an expert resume writer. Your task is to tailor a candidate's resume to perfectly match a job description.
+            Analyze the provided job description and the candidate's resume sections (summary, experience, and skills).
+            Modify the resume sections to align 100% with the job description, add value, and incorporate keywords to make the candidate a top applicant.
+
+            **Job Description:**
+            {job_description}
+
+            **Candidate's Current Resume Sections:**
+            - **Summary:** {summary}
+            - **Experience:** {json.dumps(experience, indent=2)}
+            - **Skills:** {json.dumps(skills, indent=2)}
+
+            **Instructions:**
+            1.  **Rewrite the Summary:** Make it concise and impactful, directly addressing the key requirements of the job.
+            2.  **Enhance Experience:** Do not remove existing experience. Add quantifiable achievements and responsibilities that align with the job description. If the job requires a skill the candidate has but isn't highlighted, emphasize it.
+            3.  **Expand Skills:** Add any skills from the job description that are missing from the candidate's skills list. Ensure the final list is comprehensive.
+
+            Return a JSON object with the updated "summary", "experience", and "skills" sections. Do not include any other text or explanations.
+            The JSON output should look like this:
+            {{
+                "summary": "A new, rewritten summary.",
+                "experience": [{{ ... updated experience ... }}],
+                "skills": [{{ ... updated skills ... }}]
+            }}
+            """
+
+
+def prepare_prompt(summary, experience, skills, job_description, vector_index=None):
+    """Returns the tailoring prompt compacted to the token budget and its compaction report.
+
+    The experience entries least similar to the job description are left out
+    first (see analyze_resume); the report's "experience_indexes" lists the
+    ones that were sent, for merge_experience. The entries are only ranked
+    when some have to be left out.
+    """
+    def drop_order():
+        from embeddings import relevance_order  # imports numpy, so only when entries are dropped
+        return relevance_order(experience, job_description, vector_index)[::-1]
+
+    with span("prompt_build"):
+        prompt, report = compact_prompt(
+            summary, experience, skills, job_description,
+            original_prompt=build_prompt(summary, experience, skills, job_description),
+            model=OPENAI_MODEL,
+            drop_order=drop_order
+        )
+    observe("prompt_tokens", report["tokens_before"], buckets=COUNT_BUCKETS, phase="before")
+    observe("prompt_tokens", report["tokens_after"], buckets=COUNT_BUCKETS, phase="after")
+    if report["over_budget"]:
+        increment("prompt_over_budget_total")
+    return prompt, report
+
+
+def chat_messages(prompt):
+    """Returns the chat messages for a JSON-mode tailoring prompt."""
+    return [
+        {"role": "system", "content": "You are a helpful assistant designed to output JSON."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_json_response(content):
+    """Decodes a model response, raising AnalysisError if it is not a JSON object."""
+    try:
+        with span("response_parse"):
+            value = json.loads(content)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise AnalysisError(f"OpenAI returned invalid JSON: {e}") from e
+    if not isinstance(value, dict):
+        raise AnalysisError("OpenAI returned JSON that is not an object.")
+    return value
+
+
+def record_token_usage(name, prompt, completion, usage=None):
+    """Records the tokens in and out of one completion in the metrics registry.
+
+    Uses the usage the API reported when there is one (streamed responses
+    carry none) and counts the prompt and completion text otherwise.
+    """
+    tokens_in = getattr(usage, "prompt_tokens", None) or count_tokens(prompt, OPENAI_MODEL)
+    tokens_out = getattr(usage, "completion_tokens", None) or count_tokens(completion or "", OPENAI_MODEL)
+    for direction, tokens in (("in", tokens_in), ("out", tokens_out)):
+        increment("llm_tokens_total", tokens, call=name, direction=direction)
+        observe("llm_request_tokens", tokens, buckets=COUNT_BUCKETS, call=name, direction=direction)
+
+
+def request_json_completion(client, prompt, name="openai.chat.completions"):
+    """Sends one non-streaming JSON-mode completion and returns the decoded object."""
+    start = time.perf_counter()
+    response = client.chat.completions.create(
+        model=OPENAI_MODEL,
+        response_format={"type": "json_object"},
+        messages=chat_messages(prompt)
+    )
+    record_timing(name, total=time.perf_counter() - start)
+    content = response.choices[0].message.content
+    record_token_usage(name, prompt, content, getattr(response, "usage", None))
+    return parse_json_response(content)
+
+
+def _replay_sections(modified_sections, on_section):
+    """Reports already-complete sections through on_section in stream event order."""
+    for key, value in modified_sections.items():
+        if isinstance(value, list):
+            for index, item in enumerate(value):
+                on_section(("item", key, index, item))
+        on_section(("section", key, value))
+
+
+def _read_stream(stream, on_section, cancelled, start):
+    """Feeds streamed completion chunks to a SectionStreamParser.
+
+    Returns the full text and the usage the last chunk reported, if any.
+    """
+    parser = SectionStreamParser()
+    ttfb = None
+    usage = None
+    try:
+        for chunk in stream:
+            if cancelled is not None and cancelled.is_set():
+                raise AnalysisCancelled("Analysis was cancelled.")
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if not content:
+                continue
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            for event in parser.feed(content):
+                on_section(event)
+    except json.JSONDecodeError as e:
+        raise AnalysisError(f"OpenAI returned invalid JSON: {e}") from e
+    finally:
+        stream.close()
+    record_timing("openai.chat.completions", total=time.perf_counter() - start, ttfb=ttfb)
+    return parser.text, usage
+
+
+def analyze_resume(summary, experience, skills, job_description, client=None, use_cache=True,
+                   on_section=None, cancelled=None, on_prompt_stats=None, vector_index=None):
+    """Asks OpenAI to tailor the resume sections and returns the modified sections.
+
+    Responses are served from the on-disk response cache when the same inputs
+    were analyzed before; pass use_cache=False (or set RESPONSE_CACHE_BYPASS)
+    to always call the API. Raises AnalysisError for configuration or response
+    problems; OpenAI API errors are propagated as openai.APIError so callers
+    can report them apart.
+
+    If on_section is given the completion is streamed and on_section is called
+    with each SectionStreamParser event as soon as that section (or experience
+    entry) is complete. Setting the `cancelled` threading.Event stops a
+    streaming request with AnalysisCancelled.
+
+    The prompt is compacted to PROMPT_TOKEN_BUDGET tokens (see
+    prompt.compact_prompt), leaving out the experience entries least similar
+    to the job description first (see embeddings.relevance_order; pass a
+    VectorIndex as vector_index to reuse stored vectors). Entries left out are
+    returned unchanged. on_prompt_stats, if given, receives the compaction
+    report with the token counts before and after whenever a request is sent.
+    """
+    use_cache = use_cache and not RESPONSE_CACHE_BYPASS
+    if use_cache:
+        cache_key = response_cache_key(summary, experience, skills, job_description)
+        cached = get_response_cache().get_json(cache_key)
+        if cached is not None:
+            if on_section:
+                _replay_sections(cached, on_section)
+            return cached
+
+    check_api_key()
+    if client is None:
+        client = get_openai_client()
+
+    prompt, prompt_stats = prepare_prompt(summary, experience, skills, job_description, vector_index)
+    if on_prompt_stats:
+        on_prompt_stats(prompt_stats)
+    sent_indexes = prompt_stats["experience_indexes"]
+    partial_experience = len(sent_indexes) < len(experience)
+    if on_section is not None and partial_experience:
+        report_section = on_section
+
+        def on_section(event):
+            # Map positions in the sent subset back to the full experience list
+            if event[:2] == ("item", "experience"):
+                k = event[2]
+                index = sent_indexes[k] if k < len(sent_indexes) else len(experience) + k - len(sent_indexes)
+                event = ("item", "experience", index, event[3])
+            elif event[:2] == ("section", "experience") and isinstance(event[2], list):
+                event = ("section", "experience", merge_experience(experience, sent_indexes, event[2]))
+            report_section(event)
+
+    if on_section is None:
+        modified_sections = request_json_completion(client, prompt)
+    else:
+        start = time.perf_counter()
+        response = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            response_format={"type": "json_object"},
+            messages=chat_messages(prompt),
+            stream=True
+        )
+        content, usage = _read_stream(response, on_section, cancelled, start)
+        record_token_usage("openai.chat.completions", prompt, content, usage)
+        modified_sections = parse_json_response(content)
+
+    if partial_experience and isinstance(modified_sections.get("experience"), list):
+        modified_sections["experience"] = merge_experience(experience, sent_indexes, modified_sections["experience"])
+    if use_cache:
+        get_response_cache().put_json(cache_key, modified_sections)
+    return modified_sections
+
+
+def merge_experience(original_experience, sent_indexes, tailored_entries):
+    """Puts tailored entries back at the positions they were sent from.
+
+    Entries that were not sent keep their original content; any extra
+    entries the model added are appended.
+    """
+    merged = list(original_experience)
+    for k, entry in enumerate(tailored_entries):
+        if k < len(sent_indexes):
+            merged[sent_indexes[k]] = entry
+        else:
+            merged.append(entry)
+    return merged
+
+
+def apply_modified_sections(resume_data, modified_sections):
+    """Returns a copy of resume_data with the tailored sections merged in."""
+    modified_resume_data = resume_data.copy()
+    modified_resume_data["summary"] = modified_sections.get("summary", resume_data.get("summary", ""))
+    modified_resume_data["experience"] = modified_sections.get("experience", resume_data.get("experience", []))
+    modified_resume_data["skills"] = modified_sections.get("skills", resume_data.get("skills", []))
+    return modified_resume_data
+
+
+def apply_partial_sections(resume_data, sections, experience_items):
+    """Returns resume_data with the sections received so far merged in.
+
+    experience_items maps experience indexes to entries that arrived on their
+    own (in any order); entries that have not arrived yet keep their original
+    content.
+    """
+    modified_resume_data = apply_modified_sections(resume_data, sections)
+    if "experience" not in sections and experience_items:
+        original_experience = resume_data.get("experience", [])
+        length = max(len(original_experience), max(experience_items) + 1)
+        modified_resume_data["experience"] = [
+            experience_items.get(i, original_experience[i] if i < len(original_experience) else {})
+            for i in range(length)
+        ]
+    return modified_resume_data
+
+
+def tailor_resume(resume_data, job_description, client=None, use_cache=True, sharded=False, on_prompt_stats=None):
+    """Tailors a full resume to a job description and returns the modified resume.
+
+    on_prompt_stats is passed to analyze_resume; it is not called for cached
+    responses or sharded requests.
+
+    With sharded=True the sections are tailored by concurrent smaller requests
+    (see sharding.analyze_resume_sharded). If any shard fails, AnalysisError
+    is raised naming the failed shards, so a partly tailored resume is never
+    returned as a result; the shards that succeeded are cached, so a retry
+    only re-sends the failed ones.
+    """
+    sections = (
+        resume_data.get("summary", ""),
+        resume_data.get("experience", []),
+        resume_data.get("skills", []),
+        job_description
+    )
+    if sharded:
+        from sharding import analyze_resume_sharded  # sharding imports this module
+        modified_sections, failures = analyze_resume_sharded(*sections, client=client, use_cache=use_cache)
+        if failures:
+            details = "; ".join(f"{name}: {error}" for name, error in sorted(failures.items()))
+            raise AnalysisError(f"{len(failures)} shard(s) failed: {details}")
+    else:
+        modified_sections = analyze_resume(*sections, client=client, use_cache=use_cache,
+                                           on_prompt_stats=on_prompt_stats)
+    return apply_modified_sections(resume_data, modified_sections)
+
+
+def compare_resumes(original_data, modified_data):
+    """Compares original and modified resume data and returns the change log.
+
+    The change log is the structural JSON patch between the two resumes (see
+    json_diff), with the previous value of replaced and removed items kept
+    under "old" for display.
+    """
+    with span("diff"):
+        return diff(original_data, modified_data, include_old=True)
+
+
+def describe_change(change):
+    """Returns a one-line, human readable description of a change log entry."""
+    # Prefer the pointer into the modified resume when the entry is annotated
+    path = change.get("target", change["path"]) or "/"
+    if change["op"] == "replace":
+        return f"{path}: Content modified"
+    if change["op"] == "add":
+        return f"{path}: Added"
+    if change["op"] == "remove":
+        return f"{change['path']}: Removed"
+    if change["op"] == "move":
+        return f"{change['from']}: Moved to {path}"
+    return f"{path}: {change['op']}"
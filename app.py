@@ -1,19 +1,49 @@
+import time
+STARTED_AT = time.perf_counter()  # before any other import, for --profile-startup
+
 import tkinter as tk
 from tkinter import ttk, messagebox
+import argparse
+import copy
 import json
 import os
+import sqlite3
+import sys
 from tkinter import filedialog
-import openai
-import requests
-import difflib
+import queue
+import threading
+import traceback
 from datetime import datetime
 from dotenv import load_dotenv
 load_dotenv()
 
+from analyzer import (
+    AnalysisError, MissingAPIKeyError, analyze_resume, apply_modified_sections, apply_partial_sections,
+    compare_resumes, describe_change, get_response_cache
+)
+from batch import write_result
+from cache import CACHE_DIR
+from history import get_history
+from http_client import is_openai_error
+from pdf_jobs import PDF_OUTPUT_DIR, PdfJobQueue, endpoint_configured
+from json_index import LineIndex, change_spans, dumps_with_index
+from catalog import ResumeCatalog
+from watcher import DirectoryWatcher
+import metrics
+from metrics import observe, profiled, span
+from scoring import ResumeIndex
+from sharding import analyze_resume_sharded
+from worker import AnalysisWorker
+
 # --- Configuration ---
 RESUMES_DIR = "resumes"
-PDF_GENERATOR_ENDPOINT =os.getenv("PDF_GENERATOR_ENDPOINT") 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+TAILORED_DIR = os.getenv("TAILORED_DIR", "tailored")
+WORKER_POLL_MS = 100
+METRICS_REFRESH_MS = 1000
+HISTORY_LIST_LIMIT = 500
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(CACHE_DIR, "profiles"))
+# Modules that should not be loaded before the window appears
+DEFERRED_MODULES = ("openai", "requests", "numpy", "sentence_transformers")
 
 class ResumeApp:
     def __init__(self, root):
@@ -23,8 +53,14 @@ class ResumeApp:
         
         # Store original resume data for comparison
         self.original_resume_data = None
+        self.current_resume_file = None
         self.changes_log = []
 
+        # Background worker so OpenAI calls never block the Tk main loop
+        self.analysis_worker = AnalysisWorker(self.run_analysis_job)
+        self.pdf_queue = PdfJobQueue()
+        self.last_pdf_latency = None
+
         # --- Style ---
         self.style = ttk.Style()
         self.style.theme_use("clam")
@@ -44,18 +80,41 @@ class ResumeApp:
         self.resume_label = ttk.Label(self.top_frame, text="Select Resume:")
         self.resume_label.pack(side=tk.LEFT, padx=(0, 10))
 
-        self.resume_files = self.load_resume_files()
-        self.resume_names = [self.get_resume_name(file) for file in self.resume_files]
-        
+        # Names come from the persistent catalog, refreshed in the background after the first paint
+        self.catalog = ResumeCatalog(RESUMES_DIR)
+        self.catalog_thread = None
+        self.catalog_loaded = threading.Event()  # set when the first refresh ends, even if it failed
+        # Both indexes load on the catalog thread after the first paint
+        self.resume_index = None
+        self.vector_index = None
+        self.file_events = queue.Queue()  # ("changes", (added, updated, removed)) or ("error", message)
+        self.resume_watcher = DirectoryWatcher(
+            RESUMES_DIR, self.on_resume_files_changed,
+            on_error=lambda e: self.file_events.put(("error", f"Updating the resume list failed: {e}"))
+        )
+
         self.selected_resume = tk.StringVar()
-        self.resume_dropdown = ttk.Combobox(self.top_frame, textvariable=self.selected_resume, values=self.resume_names, state="readonly", width=40)
+        self.resume_dropdown = ttk.Combobox(self.top_frame, textvariable=self.selected_resume, values=self.catalog.labels(), state="readonly", width=40)
         self.resume_dropdown.pack(side=tk.LEFT, expand=True, fill=tk.X)
         self.resume_dropdown.bind("<<ComboboxSelected>>", self.load_resume_content)
 
+        self.filter_label = ttk.Label(self.top_frame, text="Filter:")
+        self.filter_label.pack(side=tk.LEFT, padx=(10, 5))
+        self.resume_filter = tk.StringVar()
+        self.resume_filter.trace_add("write", lambda *args: self.refresh_resume_dropdown())
+        self.filter_entry = ttk.Entry(self.top_frame, textvariable=self.resume_filter, width=20)
+        self.filter_entry.pack(side=tk.LEFT)
+
         # Reset button to restore original
         self.reset_button = ttk.Button(self.top_frame, text="Reset to Original", command=self.reset_to_original)
         self.reset_button.pack(side=tk.RIGHT, padx=(10, 0))
 
+        self.rank_button = ttk.Button(self.top_frame, text="Rank Resumes", command=self.show_resume_ranking)
+        self.rank_button.pack(side=tk.RIGHT, padx=(10, 0))
+
+        self.history_button = ttk.Button(self.top_frame, text="History", command=self.show_history)
+        self.history_button.pack(side=tk.RIGHT, padx=(10, 0))
+
         # --- Middle Frame for Text Areas ---
         self.middle_frame = ttk.Frame(self.main_frame)
         self.middle_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -76,6 +135,10 @@ class ResumeApp:
         self.resume_content_text.tag_configure("modified", background="#ffeb3b", foreground="#000")
         self.resume_content_text.tag_configure("added", background="#c8e6c9", foreground="#000")
         self.resume_content_text.tag_configure("removed", background="#ffcdd2", foreground="#000", overstrike=True)
+        # Unstyled tag spanning every highlighted change, used for next/previous navigation
+        self.resume_content_text.tag_configure("change")
+        self.json_index = {}
+        self.line_index = None
 
         # Middle Text Area (Job Description)
         self.job_desc_frame = ttk.Frame(self.middle_frame, padding=10)
@@ -110,6 +173,14 @@ class ResumeApp:
         legend_removed = tk.Label(self.legend_frame, text=" Removed ", bg="#ffcdd2", font=("Arial", 9))
         legend_removed.pack(side=tk.LEFT, padx=5)
 
+        self.next_change_button = ttk.Button(self.legend_frame, text="Next Change", command=self.jump_to_next_change)
+        self.next_change_button.pack(side=tk.RIGHT, padx=5)
+        self.prev_change_button = ttk.Button(self.legend_frame, text="Previous Change", command=self.jump_to_previous_change)
+        self.prev_change_button.pack(side=tk.RIGHT, padx=5)
+        self.performance_button = ttk.Button(self.legend_frame, text="Performance", command=self.show_performance)
+        self.performance_button.pack(side=tk.RIGHT, padx=5)
+        self.profile_analyses = tk.BooleanVar(value=os.getenv("PROFILE_ANALYSES", "").lower() in ("1", "true", "yes"))
+
         # --- Bottom Frame for Buttons ---
         self.bottom_frame = ttk.Frame(self.main_frame)
         self.bottom_frame.pack(fill=tk.X, pady=10)
@@ -117,6 +188,22 @@ class ResumeApp:
         self.analyze_button = ttk.Button(self.bottom_frame, text="Start Analyzer", command=self.start_analyzer)
         self.analyze_button.pack(side=tk.LEFT, padx=10, pady=10)
 
+        self.cancel_button = ttk.Button(self.bottom_frame, text="Cancel", command=self.cancel_analysis)
+        self.cancel_button.pack(side=tk.LEFT, padx=10, pady=10)
+        self.cancel_button.config(state=tk.DISABLED)
+
+        self.use_cache = tk.BooleanVar(value=True)
+        self.use_cache_check = ttk.Checkbutton(self.bottom_frame, text="Use response cache", variable=self.use_cache)
+        self.use_cache_check.pack(side=tk.LEFT, padx=10, pady=10)
+
+        self.stream_results = tk.BooleanVar(value=True)
+        self.stream_results_check = ttk.Checkbutton(self.bottom_frame, text="Stream results", variable=self.stream_results)
+        self.stream_results_check.pack(side=tk.LEFT, padx=10, pady=10)
+
+        self.sharded_prompts = tk.BooleanVar(value=False)
+        self.sharded_prompts_check = ttk.Checkbutton(self.bottom_frame, text="Sharded prompts", variable=self.sharded_prompts)
+        self.sharded_prompts_check.pack(side=tk.LEFT, padx=10, pady=10)
+
         self.view_changes_button = ttk.Button(self.bottom_frame, text="View Detailed Changes", command=self.show_detailed_changes)
         self.view_changes_button.pack(side=tk.LEFT, padx=10, pady=10)
         self.view_changes_button.config(state=tk.DISABLED)
@@ -124,21 +211,113 @@ class ResumeApp:
         self.pdf_button = ttk.Button(self.bottom_frame, text="Generate PDF", command=self.trigger_pdf_generation)
         self.pdf_button.pack(side=tk.RIGHT, padx=10, pady=10)
 
-    def load_resume_files(self):
-        """Loads all JSON files from the resumes directory."""
-        if not os.path.exists(RESUMES_DIR):
-            os.makedirs(RESUMES_DIR)
-            return []
-        return [f for f in os.listdir(RESUMES_DIR) if f.endswith(".json")]
+        self.export_pdfs_button = ttk.Button(self.bottom_frame, text="Export All PDFs...", command=self.export_all_pdfs)
+        self.export_pdfs_button.pack(side=tk.RIGHT, padx=10, pady=10)
+
+        self.pdf_status_var = tk.StringVar(value="PDFs: idle")
+        self.pdf_status_label = ttk.Label(self.bottom_frame, textvariable=self.pdf_status_var, font=("Arial", 10))
+        self.pdf_status_label.pack(side=tk.RIGHT, padx=10)
+
+        self.status_var = tk.StringVar(value="Ready")
+        self.status_label = ttk.Label(self.bottom_frame, textvariable=self.status_var, font=("Arial", 10))
+        self.status_label.pack(side=tk.LEFT, padx=10)
+
+        self.queue_status_var = tk.StringVar(value="Idle")
+        self.queue_status_label = ttk.Label(self.bottom_frame, textvariable=self.queue_status_var, font=("Arial", 10))
+        self.queue_status_label.pack(side=tk.LEFT, padx=10)
+
+        self.root.after(WORKER_POLL_MS, self.process_worker_events)
+        self.root.after(WORKER_POLL_MS, self.process_pdf_events)
+        self.root.after_idle(self.start_catalog_refresh)
+
+    def start_catalog_refresh(self):
+        """Refreshes the resume catalog on a background thread."""
+        if self.catalog_thread is not None:
+            return
+        self.status_var.set("Loading resumes...")
+        self.catalog_thread = threading.Thread(target=self.refresh_catalog_and_index, name="catalog-refresh", daemon=True)
+        self.catalog_thread.start()
+        self.root.after(WORKER_POLL_MS, self.check_catalog_refresh)
+
+    def check_catalog_refresh(self):
+        """Updates the dropdown once the background catalog refresh has finished."""
+        if self.catalog_thread.is_alive():
+            self.root.after(WORKER_POLL_MS, self.check_catalog_refresh)
+            return
+        self.catalog_thread = None
+        self.refresh_resume_dropdown()
+        self.status_var.set(f"Loaded {len(self.catalog.entries)} resumes")
+
+        # Watch for edits from here on; the catalog is now in sync with the disk
+        self.resume_watcher.start()
+        self.root.after(WORKER_POLL_MS, self.process_file_events)
+
+    def refresh_catalog_and_index(self):
+        """Runs on a background thread: rescans the catalog, then re-indexes changed resumes for ranking."""
+        try:
+            with span("catalog_load"):
+                self.catalog.refresh()
+            if self.vector_index is None:
+                with span("index_load"):
+                    from embeddings import VECTOR_DIR_NAME, VectorIndex  # imports numpy
+                    self.resume_index = ResumeIndex(RESUMES_DIR)
+                    self.vector_index = VectorIndex(os.path.join(RESUMES_DIR, VECTOR_DIR_NAME))
+            with span("index_sync"):
+                self.resume_index.sync(self.catalog)
+                self.vector_index.sync(self.catalog)
+        except Exception as e:
+            traceback.print_exc()
+            self.file_events.put(("error", f"Loading the resume catalog and indexes failed: {e}"))
+        finally:
+            self.catalog_loaded.set()
+
+    def indexes_ready(self):
+        """Returns True once both ranking indexes have loaded."""
+        return self.resume_index is not None and self.vector_index is not None
+
+    def on_resume_files_changed(self, filenames):
+        """Runs on the watcher thread: re-reads only the changed files and notifies the UI."""
+        changes = self.catalog.update_files(filenames)
+        try:
+            if self.indexes_ready():
+                self.resume_index.sync(self.catalog)
+                self.vector_index.sync(self.catalog)
+        except Exception as e:
+            traceback.print_exc()
+            self.file_events.put(("error", f"Re-indexing changed resumes failed: {e}"))
+        self.file_events.put(("changes", changes))
 
-    def get_resume_name(self, filename):
-        """Extracts the resume name from the JSON file content."""
+    def process_file_events(self):
+        """Applies catalog changes from the watcher on the Tk thread and reschedules itself."""
         try:
-            with open(os.path.join(RESUMES_DIR, filename), 'r') as f:
-                data = json.load(f)
-                return data.get("name", "Unnamed Resume")
-        except (json.JSONDecodeError, FileNotFoundError):
-            return "Error Reading Resume"
+            while True:
+                kind, payload = self.file_events.get_nowait()
+                if kind == "error":
+                    self.status_var.set(payload)
+                    continue
+                added, updated, removed = payload
+                self.refresh_resume_dropdown()
+                if self.current_resume_file in removed:
+                    messagebox.showwarning("Resume Removed", f"{self.current_resume_file} was removed from {RESUMES_DIR}.")
+                elif self.current_resume_file in updated:
+                    self.prompt_resume_reload()
+                if added or updated or removed:
+                    self.status_var.set(f"Resumes updated: {len(added)} added, {len(updated)} changed, {len(removed)} removed")
+        except queue.Empty:
+            pass
+        finally:
+            # Keep polling even if handling one event raised
+            self.root.after(WORKER_POLL_MS, self.process_file_events)
+
+    def prompt_resume_reload(self):
+        """Asks whether to reload the current resume after it changed on disk."""
+        if messagebox.askyesno("Resume Changed", f"{self.current_resume_file} changed on disk. Reload it?\nUnsaved analysis results will be discarded."):
+            self.selected_resume.set(self.catalog.label_for_file(self.current_resume_file) or "")
+            self.load_resume_content()
+
+    def refresh_resume_dropdown(self):
+        """Shows the catalog labels that match the filter text in the dropdown."""
+        self.resume_dropdown.config(values=self.catalog.search(self.resume_filter.get()))
 
     def load_resume_content(self, event=None):
         """Loads the content of the selected resume into the text area."""
@@ -146,15 +325,17 @@ class ResumeApp:
         if not selected_name:
             return
             
-        selected_index = self.resume_names.index(selected_name)
-        selected_file = self.resume_files[selected_index]
-        
+        selected_file = self.catalog.file_for_label(selected_name)
+        if selected_file is None:
+            return
+
         try:
-            with open(os.path.join(RESUMES_DIR, selected_file), 'r') as f:
-                content = json.load(f)
+            with open(self.catalog.path_for(selected_file), 'r') as f:
+                with span("json_parse"):
+                    content = json.load(f)
                 self.original_resume_data = content.copy()  # Store original data
-                self.resume_content_text.delete("1.0", tk.END)
-                self.resume_content_text.insert(tk.END, json.dumps(content, indent=4))
+                self.current_resume_file = selected_file
+                self.render_resume_json(content)
                 
                 # Clear changes log
                 self.changes_text.config(state=tk.NORMAL)
@@ -169,8 +350,7 @@ class ResumeApp:
     def reset_to_original(self):
         """Resets the resume content to the original version."""
         if self.original_resume_data:
-            self.resume_content_text.delete("1.0", tk.END)
-            self.resume_content_text.insert(tk.END, json.dumps(self.original_resume_data, indent=4))
+            self.render_resume_json(self.original_resume_data)
             
             # Clear changes log
             self.changes_text.config(state=tk.NORMAL)
@@ -183,93 +363,64 @@ class ResumeApp:
         else:
             messagebox.showwarning("No Original", "No original resume data to reset to. Please select a resume first.")
 
+    def render_resume_json(self, resume_data):
+        """Writes resume JSON into the left text area and indexes where each value is."""
+        with span("render"):
+            json_text, self.json_index = dumps_with_index(resume_data, indent=4)
+            self.line_index = LineIndex(json_text)
+            self.resume_content_text.delete("1.0", tk.END)
+            self.resume_content_text.insert(tk.END, json_text)
+
     def compare_and_highlight_changes(self, original_data, modified_data):
         """Compares original and modified data, highlights changes and logs them."""
-        self.changes_log = []
-        
-        # Compare summary
-        if original_data.get("summary") != modified_data.get("summary"):
-            self.changes_log.append({
-                "section": "Summary",
-                "type": "modified",
-                "original": original_data.get("summary", ""),
-                "modified": modified_data.get("summary", "")
-            })
-
-        # Compare experience
-        original_exp = original_data.get("experience", [])
-        modified_exp = modified_data.get("experience", [])
-        
-        if len(original_exp) != len(modified_exp):
-            self.changes_log.append({
-                "section": "Experience",
-                "type": "count_changed",
-                "original_count": len(original_exp),
-                "modified_count": len(modified_exp)
-            })
-        
-        # Compare each experience entry
-        for i, (orig, mod) in enumerate(zip(original_exp, modified_exp)):
-            if orig != mod:
-                self.changes_log.append({
-                    "section": f"Experience[{i}]",
-                    "type": "modified",
-                    "original": orig,
-                    "modified": mod
-                })
-
-        # Compare skills
-        original_skills = set(original_data.get("skills", []))
-        modified_skills = set(modified_data.get("skills", []))
-        
-        added_skills = modified_skills - original_skills
-        removed_skills = original_skills - modified_skills
-        
-        if added_skills:
-            self.changes_log.append({
-                "section": "Skills",
-                "type": "added",
-                "items": list(added_skills)
-            })
-        
-        if removed_skills:
-            self.changes_log.append({
-                "section": "Skills",
-                "type": "removed",
-                "items": list(removed_skills)
-            })
+        self.changes_log = compare_resumes(original_data, modified_data)
 
         # Update the changes display
         self.update_changes_display()
         
         # Highlight changes in the JSON text
-        self.highlight_json_changes(original_data, modified_data)
+        self.highlight_json_changes()
 
-    def highlight_json_changes(self, original_data, modified_data):
-        """Highlights the changed sections in the JSON text widget."""
-        json_text = self.resume_content_text.get("1.0", tk.END)
-        self.resume_content_text.delete("1.0", tk.END)
-        self.resume_content_text.insert(tk.END, json_text)
-        
-        # Find and highlight changed sections
-        lines = json_text.split('\n')
-        
-        for i, line in enumerate(lines):
-            line_start = f"{i+1}.0"
-            line_end = f"{i+1}.end"
-            
-            # Check if this line contains modified content
-            if '"summary"' in line and original_data.get("summary") != modified_data.get("summary"):
-                self.resume_content_text.tag_add("modified", line_start, line_end)
-            elif '"skills"' in line:
-                original_skills = set(original_data.get("skills", []))
-                modified_skills = set(modified_data.get("skills", []))
-                if original_skills != modified_skills:
-                    self.resume_content_text.tag_add("modified", line_start, line_end)
-            elif any(keyword in line.lower() for keyword in ['company', 'position', 'description', 'responsibilities']):
-                # Check if this is part of a modified experience entry
-                if original_data.get("experience") != modified_data.get("experience"):
-                    self.resume_content_text.tag_add("modified", line_start, line_end)
+    def highlight_json_changes(self):
+        """Tags the exact spans of the changed values in the JSON text widget.
+
+        Relies on the offset index built by render_resume_json, so the text is
+        never rewritten or scanned (see json_index.change_spans).
+        """
+        with span("highlight"):
+            for tag in ("modified", "added", "removed", "change"):
+                self.resume_content_text.tag_remove(tag, "1.0", tk.END)
+            if self.line_index is None:
+                return
+
+            for tag, start, end in change_spans(self.changes_log, self.json_index):
+                start_index = self.line_index.tk_index(start)
+                end_index = self.line_index.tk_index(end)
+                self.resume_content_text.tag_add(tag, start_index, end_index)
+                self.resume_content_text.tag_add("change", start_index, end_index)
+
+    def jump_to_next_change(self):
+        """Moves the cursor to the next highlighted change, wrapping around."""
+        text = self.resume_content_text
+        found = text.tag_nextrange("change", "insert +1c") or text.tag_nextrange("change", "1.0")
+        self.show_change_range(found)
+
+    def jump_to_previous_change(self):
+        """Moves the cursor to the previous highlighted change, wrapping around."""
+        text = self.resume_content_text
+        current = text.tag_prevrange("change", "insert +1c")
+        if current and text.compare(current[0], "==", "insert"):
+            current = text.tag_prevrange("change", "insert")
+        found = current or text.tag_prevrange("change", tk.END)
+        self.show_change_range(found)
+
+    def show_change_range(self, found):
+        """Places the cursor at a change range and scrolls it into view."""
+        if not found:
+            return
+        self.resume_content_text.mark_set(tk.INSERT, found[0])
+        self.resume_content_text.see(found[0])
+        self.resume_content_text.focus_set()
 
     def update_changes_display(self):
         """Updates the changes text widget with a summary of changes."""
@@ -285,20 +436,7 @@ class ResumeApp:
         self.changes_text.insert(tk.END, f"Changes made on {timestamp}:\n\n")
         
         for i, change in enumerate(self.changes_log, 1):
-            section = change["section"]
-            change_type = change["type"]
-            
-            if change_type == "modified":
-                self.changes_text.insert(tk.END, f"{i}. {section}: Content modified\n")
-            elif change_type == "added":
-                items = ", ".join(change["items"])
-                self.changes_text.insert(tk.END, f"{i}. {section}: Added items - {items}\n")
-            elif change_type == "removed":
-                items = ", ".join(change["items"])
-                self.changes_text.insert(tk.END, f"{i}. {section}: Removed items - {items}\n")
-            elif change_type == "count_changed":
-                self.changes_text.insert(tk.END, f"{i}. {section}: Count changed from {change['original_count']} to {change['modified_count']}\n")
-            
+            self.changes_text.insert(tk.END, f"{i}. {describe_change(change)}\n")
             self.changes_text.insert(tk.END, "\n")
         
         self.changes_text.config(state=tk.DISABLED)
@@ -328,25 +466,28 @@ class ResumeApp:
         
         # Populate with detailed changes
         for i, change in enumerate(self.changes_log, 1):
-            text_widget.insert(tk.END, f"=== CHANGE {i}: {change['section']} ===\n")
+            text_widget.insert(tk.END, f"=== CHANGE {i}: {change['path'] or '/'} ===\n")
             
-            if change["type"] == "modified":
+            if change["op"] == "replace":
                 text_widget.insert(tk.END, "\nORIGINAL:\n")
-                text_widget.insert(tk.END, f"{change['original']}\n\n")
+                text_widget.insert(tk.END, f"{json.dumps(change.get('old'), indent=2)}\n\n")
                 text_widget.insert(tk.END, "MODIFIED:\n")
-                text_widget.insert(tk.END, f"{change['modified']}\n\n")
-            elif change["type"] in ["added", "removed"]:
-                text_widget.insert(tk.END, f"\n{change['type'].upper()} ITEMS:\n")
-                for item in change["items"]:
-                    text_widget.insert(tk.END, f"- {item}\n")
-                text_widget.insert(tk.END, "\n")
+                text_widget.insert(tk.END, f"{json.dumps(change['value'], indent=2)}\n\n")
+            elif change["op"] == "add":
+                text_widget.insert(tk.END, "\nADDED:\n")
+                text_widget.insert(tk.END, f"{json.dumps(change['value'], indent=2)}\n\n")
+            elif change["op"] == "remove":
+                text_widget.insert(tk.END, "\nREMOVED:\n")
+                text_widget.insert(tk.END, f"{json.dumps(change.get('old'), indent=2)}\n\n")
+            elif change["op"] == "move":
+                text_widget.insert(tk.END, f"\nMOVED from {change['from']} to {change['path']}\n\n")
             
             text_widget.insert(tk.END, "-" * 50 + "\n\n")
         
         text_widget.config(state=tk.DISABLED)
 
     def start_analyzer(self):
-        """The main function to start the analysis process."""
+        """Queues an analysis of the current resume against the job description."""
         resume_json_str = self.resume_content_text.get("1.0", tk.END)
         job_description = self.job_desc_text.get("1.0", tk.END)
 
@@ -359,131 +500,522 @@ class ResumeApp:
             return
 
         try:
-            current_resume_data = json.loads(resume_json_str)
+            with span("json_parse"):
+                current_resume_data = json.loads(resume_json_str)
         except json.JSONDecodeError:
             messagebox.showerror("Error", "Invalid JSON format in the resume content.")
             return
 
-        # Make a copy to avoid modifying the current data
-        modified_resume_data = current_resume_data.copy()
+        self.submit_analysis(self.current_resume_file, self.original_resume_data, current_resume_data, job_description)
+
+    def submit_analysis(self, resume_file, original_resume_data, current_resume_data, job_description):
+        """Queues one resume for tailoring with the current analysis options."""
+        # Snapshot everything the worker needs; the widgets stay editable meanwhile
+        self.analysis_worker.submit({
+            "resume_file": resume_file,
+            "original": original_resume_data,
+            "current": current_resume_data,
+            "job_description": job_description,
+            "use_cache": self.use_cache.get(),
+            "stream": self.stream_results.get(),
+            "streamed_sections": {},
+            "streamed_experience": {},
+            "sharded": self.sharded_prompts.get(),
+            "profile": self.profile_analyses.get(),
+            "submitted_at": time.perf_counter(),
+        })
+        self.update_worker_status()
+
+    def show_resume_ranking(self):
+        """Ranks every resume against the job description locally and shows the result."""
+        job_description = self.job_desc_text.get("1.0", tk.END)
+        if not job_description.strip():
+            messagebox.showwarning("Input Required", "Please provide a job description to rank resumes against.")
+            return
+
+        if self.catalog_thread is not None:
+            messagebox.showinfo("Rank Resumes", "Resumes are still being indexed. Please try again in a moment.")
+            return
+        if not self.indexes_ready():
+            messagebox.showerror("Rank Resumes", "The resume indexes could not be loaded; see the console for details.")
+            return
+
+        start = time.perf_counter()
+        results = self.resume_index.rank(job_description)
+        similarities = self.vector_index.file_similarity(job_description)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if not results:
+            messagebox.showinfo("Rank Resumes", "No resumes have been indexed yet.")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("Resume Ranking")
+        window.geometry("1000x600")
+        ttk.Label(window, text=f"Ranked {len(results)} resumes in {elapsed_ms:.1f} ms", font=("Arial", 11)).pack(anchor="w", padx=10, pady=(10, 0))
+
+        columns = ("resume", "score", "similarity", "matched", "missing")
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for column, width in zip(columns, (200, 70, 80, 300, 300)):
+            tree.heading(column, text=column.title())
+            tree.column(column, width=width, anchor="w")
+        for result in results:
+            tree.insert("", tk.END, iid=result["file"], values=(
+                self.catalog.label_for_file(result["file"]) or result["file"],
+                f"{result['score']:.2f}",
+                f"{similarities.get(result['file'], 0.0):.2f}",
+                ", ".join(result["matched"]),
+                ", ".join(result["missing"])
+            ))
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        button_frame = ttk.Frame(window)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Label(button_frame, text="Top K:").pack(side=tk.LEFT)
+        top_k = tk.IntVar(value=min(5, len(results)))
+        ttk.Spinbox(button_frame, from_=1, to=len(results), textvariable=top_k, width=5).pack(side=tk.LEFT, padx=5)
+
+        def analyze_top_k():
+            try:
+                count = top_k.get()
+            except tk.TclError:
+                return
+            self.analyze_ranked_resumes([r["file"] for r in results[:count]], job_description)
+            window.destroy()
+
+        def load_selected():
+            selection = tree.selection()
+            if selection:
+                self.selected_resume.set(self.catalog.label_for_file(selection[0]) or "")
+                self.load_resume_content()
+
+        ttk.Button(button_frame, text="Analyze Top K", command=analyze_top_k).pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="Load Selected", command=load_selected).pack(side=tk.LEFT, padx=10)
+
+    def analyze_ranked_resumes(self, filenames, job_description):
+        """Queues the given resume files for tailoring; results for other resumes go to TAILORED_DIR."""
+        queued = 0
+        for filename in filenames:
+            try:
+                with open(self.catalog.path_for(filename), 'r') as f:
+                    resume_data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                messagebox.showerror("Error", f"Could not load {filename}: {e}")
+                continue
+            self.submit_analysis(filename, resume_data, resume_data, job_description)
+            queued += 1
+        self.status_var.set(f"Queued {queued} top-ranked resumes for analysis")
+
+    def cancel_analysis(self):
+        """Cancels the running analysis and every queued one."""
+        self.analysis_worker.cancel_all()
+        self.update_worker_status()
 
+    def run_analysis_job(self, job, report_progress):
+        """Runs on the worker thread: tailors the job's resume without touching Tk.
+
+        With profiling on, the job runs under cProfile and the stats are saved
+        to PROFILE_DIR (see metrics.profiled).
+        """
+        observe("queue_wait_seconds", time.perf_counter() - job["submitted_at"], queue="analysis")
+        if job["profile"]:
+            job["profile_path"] = os.path.join(PROFILE_DIR, f"analysis-{datetime.now():%Y%m%d-%H%M%S}-job{job['id']}.prof")
+        with profiled(job["profile"], job.get("profile_path")), span("analysis"):
+            modified_resume_data = self.tailor_job_resume(job, report_progress)
+        self.record_history(job, modified_resume_data)
+        return modified_resume_data
+
+    def record_history(self, job, modified_resume_data):
+        """Runs on the worker thread: stores the finished run in the tailoring history.
+
+        The history is best effort: any failure is logged and noted on the
+        job, and the analysis result is shown anyway.
+        """
+        if job["cancelled"].is_set():
+            return
+        meta = {"source": "app", "sharded": job["sharded"]}
+        if job.get("prompt_stats"):
+            meta["prompt_tokens"] = job["prompt_stats"]["tokens_after"]
         try:
-            # 1. Analyze and modify the resume with OpenAI
-            messagebox.showinfo("In Progress", "Starting resume analysis with OpenAI...\nThis may take a moment.")
-            self.root.update_idletasks() # Update UI to show message
-
-            modified_sections = self.analyze_with_openai(
-                modified_resume_data.get("summary", ""),
-                modified_resume_data.get("experience", []),
-                modified_resume_data.get("skills", []),
-                job_description
+            history = get_history()
+            if history is not None:
+                job["history_id"] = history.record_run(
+                    job["resume_file"], job["original"], modified_resume_data, job["job_description"], meta
+                )
+        except Exception as e:
+            traceback.print_exc()
+            job["history_error"] = str(e)
+
+    def tailor_job_resume(self, job, report_progress):
+        """Runs on the worker thread: sends the job's resume to OpenAI and merges the result."""
+        current_resume_data = job["current"]
+        report_progress("Analyzing resume with OpenAI...")
+        sections = (
+            current_resume_data.get("summary", ""),
+            current_resume_data.get("experience", []),
+            current_resume_data.get("skills", []),
+            job["job_description"]
+        )
+        if job["sharded"]:
+            # Shards always report sections as they finish
+            modified_sections, job["shard_failures"] = analyze_resume_sharded(
+                *sections, use_cache=job["use_cache"], on_section=report_progress, cancelled=job["cancelled"]
+            )
+        else:
+            def report_prompt_stats(stats):
+                job["prompt_stats"] = stats
+                report_progress(f"Sending prompt: {stats['tokens_before']} -> {stats['tokens_after']} tokens")
+
+            modified_sections = analyze_resume(
+                *sections,
+                use_cache=job["use_cache"],
+                on_section=report_progress if job["stream"] else None,
+                cancelled=job["cancelled"],
+                on_prompt_stats=report_prompt_stats,
+                vector_index=self.vector_index
             )
+        return apply_modified_sections(current_resume_data, modified_sections)
 
-            if not modified_sections:
-                return # Error already shown in analyze_with_openai
+    def process_worker_events(self):
+        """Drains worker events on the Tk thread and reschedules itself."""
+        try:
+            while True:
+                kind, job, payload = self.analysis_worker.events.get_nowait()
+                if kind == "started":
+                    job["started_at"] = time.perf_counter()
+                elif kind == "progress" and isinstance(payload, tuple):
+                    self.show_streamed_section(job, payload)
+                elif kind == "progress":
+                    self.status_var.set(f"Job {job['id']}: {payload}")
+                elif kind == "done":
+                    self.finish_analysis(job, payload)
+                elif kind == "error":
+                    self.discard_streamed_output(job)
+                    self.show_analysis_error(payload)
+                elif kind == "cancelled":
+                    self.discard_streamed_output(job)
+                    self.status_var.set(f"Job {job['id']} cancelled")
+                self.update_worker_status()
+        except queue.Empty:
+            pass
+        finally:
+            # Keep polling even if handling one event raised
+            self.root.after(WORKER_POLL_MS, self.process_worker_events)
 
-            # Update the resume data with the modified sections
-            modified_resume_data["summary"] = modified_sections.get("summary", modified_resume_data.get("summary", ""))
-            modified_resume_data["experience"] = modified_sections.get("experience", modified_resume_data.get("experience", []))
-            modified_resume_data["skills"] = modified_sections.get("skills", modified_resume_data.get("skills", []))
+    def update_worker_status(self):
+        """Refreshes the status line and the Cancel button from the worker state."""
+        running, queued = self.analysis_worker.status()
+        if running or queued:
+            self.queue_status_var.set(f"Analyzing: {running} running, {queued} queued")
+            self.cancel_button.config(state=tk.NORMAL)
+        else:
+            self.queue_status_var.set("Idle")
+            self.cancel_button.config(state=tk.DISABLED)
 
-            # Compare and highlight changes
-            self.compare_and_highlight_changes(self.original_resume_data, modified_resume_data)
+    def finish_analysis(self, job, modified_resume_data):
+        """Shows a finished analysis, or saves it if another resume is loaded now."""
+        if job["resume_file"] != self.current_resume_file:
+            changes_log = compare_resumes(job["original"], modified_resume_data)
+            stem = f"{os.path.splitext(job['resume_file'])[0]}__job{job['id']}"
+            saved_path = write_result(TAILORED_DIR, stem, modified_resume_data, changes_log)
+            self.status_var.set(f"Job {job['id']} finished for another resume; saved to {saved_path}")
+            return
 
-            # Display the modified JSON in the left text box for review
-            self.resume_content_text.delete("1.0", tk.END)
-            self.resume_content_text.insert(tk.END, json.dumps(modified_resume_data, indent=4))
-            
-            # Re-apply highlighting after inserting new content
-            self.highlight_json_changes(self.original_resume_data, modified_resume_data)
-            
-            messagebox.showinfo("Analysis Complete", f"Resume has been updated with {len(self.changes_log)} changes detected. Review the highlighted changes before generating the PDF.")
+        self.show_modified_resume(modified_resume_data)
 
-        except Exception as e:
-            messagebox.showerror("Error", f"An unexpected error occurred: {e}")
+        cache_stats = get_response_cache().stats()
+        failed_shards = job.get("shard_failures")
+        failure_note = ""
+        if failed_shards:
+            failure_note = f" {len(failed_shards)} shard(s) failed and kept the original: {', '.join(failed_shards)}."
+        prompt_stats = job.get("prompt_stats")
+        if prompt_stats:
+            failure_note += f" Prompt: {prompt_stats['tokens_before']} -> {prompt_stats['tokens_after']} tokens"
+            if prompt_stats["dropped_experience"]:
+                failure_note += f", {prompt_stats['dropped_experience']} less relevant experience entries not sent"
+            if prompt_stats["over_budget"]:
+                failure_note += f", still over the {prompt_stats['budget']} token budget"
+            failure_note += "."
+        if job.get("profile_path"):
+            failure_note += f" Profile saved to {job['profile_path']}."
+        if job.get("history_error"):
+            failure_note += f" Not saved to the history: {job['history_error']}."
+        self.status_var.set(
+            f"Job {job['id']} complete: {len(self.changes_log)} changes detected.{failure_note} "
+            f"Review the highlighted changes before generating the PDF. "
+            f"(cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses)"
+        )
 
-    def analyze_with_openai(self, summary, experience, skills, job_description):
-        """Analyzes and modifies resume sections using OpenAI."""
-        if not OPENAI_API_KEY or OPENAI_API_KEY == "YOUR_OPENAI_API_KEY":
-            messagebox.showerror("OpenAI API Key Missing", "Please set your OpenAI API key in the script.")
-            return None
+    def show_history(self):
+        """Lists earlier tailoring runs of this resume or against this job description, and loads any of them."""
+        history = get_history()
+        if history is None:
+            messagebox.showinfo("History", "The tailoring history is disabled (HISTORY_DISABLED).")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("Tailoring History")
+        window.geometry("1000x500")
+
+        scope = tk.StringVar(value="resume" if self.current_resume_file else "all")
+        scope_frame = ttk.Frame(window)
+        scope_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+        for value, text in (("resume", "This resume"), ("job", "This job description"), ("all", "All runs")):
+            ttk.Radiobutton(scope_frame, text=text, value=value, variable=scope,
+                            command=lambda: fill()).pack(side=tk.LEFT, padx=(0, 10))
+
+        columns = ("run", "date", "resume", "job", "changes")
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for column, width in zip(columns, (60, 150, 200, 450, 70)):
+            tree.heading(column, text=column.title())
+            tree.column(column, width=width, anchor="w")
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        job_titles = {}
+
+        def job_title(job_hash):
+            if job_hash not in job_titles:
+                text = history.job_description(job_hash) or ""
+                job_titles[job_hash] = next((line.strip() for line in text.splitlines() if line.strip()), "")
+            return job_titles[job_hash]
+
+        def fill():
+            tree.delete(*tree.get_children())
+            try:
+                if scope.get() == "resume":
+                    runs = history.runs_for_resume(self.current_resume_file or "", limit=HISTORY_LIST_LIMIT)
+                elif scope.get() == "job":
+                    runs = history.runs_for_job(self.job_desc_text.get("1.0", tk.END), limit=HISTORY_LIST_LIMIT)
+                else:
+                    runs = history.recent_runs(limit=HISTORY_LIST_LIMIT)
+            except sqlite3.Error as e:
+                messagebox.showerror("History", f"Could not read the history: {e}", parent=window)
+                return
+            for run in runs:
+                tree.insert("", tk.END, iid=str(run["id"]), values=(
+                    run["id"],
+                    datetime.fromtimestamp(run["created_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+                    self.catalog.label_for_file(run["resume_file"]) or run["resume_file"],
+                    job_title(run["job_hash"]),
+                    run["change_count"]
+                ))
+
+        def load_selected():
+            selection = tree.selection()
+            if selection:
+                self.load_history_run(history, int(selection[0]))
+
+        def delete_selected():
+            selection = tree.selection()
+            if selection and messagebox.askyesno("History", f"Delete {len(selection)} run(s)?", parent=window):
+                for run_id in selection:
+                    history.delete_run(int(run_id))
+                fill()
+
+        button_frame = ttk.Frame(window)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(button_frame, text="Load Version", command=load_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Delete", command=delete_selected).pack(side=tk.LEFT, padx=5)
+        fill()
 
+    def load_history_run(self, history, run_id):
+        """Shows a run from the history: its base resume as the original, the tailored version highlighted."""
         try:
-            client = openai.OpenAI(api_key=OPENAI_API_KEY)
-            
-            prompt = f"""
-            You are an expert resume writer. Your task is to tailor a candidate's resume to perfectly match a job description.
-            Analyze the provided job description and the candidate's resume sections (summary, experience, and skills).
-            Modify the resume sections to align 100% with the job description, add value, and incorporate keywords to make the candidate a top applicant.
-
-            **Job Description:**
-            {job_description}
-
-            **Candidate's Current Resume Sections:**
-            - **Summary:** {summary}
-            - **Experience:** {json.dumps(experience, indent=2)}
-            - **Skills:** {json.dumps(skills, indent=2)}
-
-            **Instructions:**
-            1.  **Rewrite the Summary:** Make it concise and impactful, directly addressing the key requirements of the job.
-            2.  **Enhance Experience:** Do not remove existing experience. Add quantifiable achievements and responsibilities that align with the job description. If the job requires a skill the candidate has but isn't highlighted, emphasize it.
-            3.  **Expand Skills:** Add any skills from the job description that are missing from the candidate's skills list. Ensure the final list is comprehensive.
-
-            Return a JSON object with the updated "summary", "experience", and "skills" sections. Do not include any other text or explanations.
-            The JSON output should look like this:
-            {{
-                "summary": "A new, rewritten summary.",
-                "experience": [{{ ... updated experience ... }}],
-                "skills": [{{ ... updated skills ... }}]
-            }}
-            """
-
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                response_format={"type": "json_object"},
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant designed to output JSON."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            run = history.run(run_id)
+            base = copy.deepcopy(history.base(run_id))
+            version = history.version(run_id)
+            job_description = history.job_description(run["job_hash"])
+        except (KeyError, TypeError, sqlite3.Error) as e:
+            messagebox.showerror("History", f"Could not load run {run_id}: {e}")
+            return
+
+        self.current_resume_file = run["resume_file"]
+        self.selected_resume.set(self.catalog.label_for_file(run["resume_file"]) or "")
+        self.original_resume_data = base
+        self.job_desc_text.delete("1.0", tk.END)
+        self.job_desc_text.insert(tk.END, job_description or "")
+        self.show_modified_resume(version)
+        self.status_var.set(f"Loaded run {run_id} from the history: {len(self.changes_log)} changes")
+
+    def show_performance(self):
+        """Opens a window with the timing histograms and counters of every pipeline stage."""
+        window = tk.Toplevel(self.root)
+        window.title("Performance")
+        window.geometry("1000x500")
+
+        columns = ("metric", "labels", "count", "mean", "p50", "p95", "max")
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for column, width in zip(columns, (200, 360, 70, 90, 90, 90, 90)):
+            tree.heading(column, text=column.title())
+            tree.column(column, width=width, anchor="w")
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        def fill():
+            tree.delete(*tree.get_children())
+            for metric in metrics.snapshot():
+                labels = ", ".join(f"{k}={v}" for k, v in metric["labels"].items())
+                if metric["type"] == "counter":
+                    tree.insert("", tk.END, values=(metric["name"], labels, metric["value"], "", "", "", ""))
+                    continue
+                # Durations are shown in milliseconds, token counts as they are
+                scale, unit = (1000, " ms") if metric["name"].endswith("_seconds") else (1, "")
+                tree.insert("", tk.END, values=(
+                    metric["name"], labels, metric["count"],
+                    *(f"{value * scale:.1f}{unit}" for value in (
+                        metric["sum"] / metric["count"], metric["p50"], metric["p95"], metric["max"]))
+                ))
+
+        def refresh():
+            if window.winfo_exists():
+                fill()
+                window.after(METRICS_REFRESH_MS, refresh)
+
+        def export(kind):
+            extension = ".prom" if kind == "prometheus" else ".jsonl"
+            path = filedialog.asksaveasfilename(parent=window, defaultextension=extension,
+                                                initialfile=f"metrics{extension}")
+            if not path:
+                return
+            try:
+                if kind == "prometheus":
+                    with open(path, 'w') as f:
+                        f.write(metrics.to_prometheus())
+                else:
+                    metrics.write_jsonl(path)
+            except OSError as e:
+                messagebox.showerror("Export Failed", f"Could not write {path}: {e}", parent=window)
 
-            return json.loads(response.choices[0].message.content)
+        button_frame = ttk.Frame(window)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(button_frame, text="Export Prometheus...", command=lambda: export("prometheus")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Export JSONL...", command=lambda: export("jsonl")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Reset", command=lambda: (metrics.reset(), fill())).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(button_frame, text=f"Profile analyses (saved to {PROFILE_DIR})",
+                        variable=self.profile_analyses).pack(side=tk.RIGHT, padx=5)
+        refresh()
 
-        except openai.APIError as e:
-            messagebox.showerror("OpenAI Error", f"OpenAI API error: {e}")
+    def show_streamed_section(self, job, event):
+        """Renders a partially streamed result as soon as a section or experience entry completes."""
+        if event[0] == "item" and event[1] == "experience":
+            job["streamed_experience"][event[2]] = event[3]
+        elif event[0] == "section" and event[1] in ("summary", "experience", "skills"):
+            job["streamed_sections"][event[1]] = event[2]
+        else:
+            return
+
+        if job["resume_file"] != self.current_resume_file:
+            return
+
+        partial_resume_data = apply_partial_sections(job["current"], job["streamed_sections"], job["streamed_experience"])
+        self.show_modified_resume(partial_resume_data)
+
+        section = "experience entry" if event[0] == "item" else event[1]
+        elapsed = time.perf_counter() - job.get("started_at", time.perf_counter())
+        if "first_content_at" not in job:
+            job["first_content_at"] = elapsed
+        self.status_var.set(f"Job {job['id']}: received {section} after {elapsed:.1f}s "
+                            f"(first content after {job['first_content_at']:.1f}s)")
+
+    def discard_streamed_output(self, job):
+        """Puts back the resume a cancelled or failed job started from if partial output was drawn."""
+        if job["resume_file"] != self.current_resume_file:
+            return
+        if job["streamed_sections"] or job["streamed_experience"]:
+            self.show_modified_resume(job["current"])
+
+    def show_modified_resume(self, modified_resume_data):
+        """Displays a (possibly partial) modified resume with its changes highlighted."""
+        # Display the modified JSON in the left text box for review
+        self.render_resume_json(modified_resume_data)
+
+        # Compare and highlight changes
+        self.compare_and_highlight_changes(self.original_resume_data, modified_resume_data)
+
+    def show_analysis_error(self, error):
+        """Reports a failed analysis with the same dialogs as analyze_with_openai."""
+        if isinstance(error, MissingAPIKeyError):
+            messagebox.showerror("OpenAI API Key Missing", str(error))
+        elif is_openai_error(error):
+            messagebox.showerror("OpenAI Error", f"OpenAI API error: {error}")
+        elif isinstance(error, AnalysisError):
+            messagebox.showerror("Analysis Error", f"Failed to analyze with OpenAI: {error}")
+        else:
+            messagebox.showerror("Error", f"An unexpected error occurred: {error}")
+
+    def analyze_with_openai(self, summary, experience, skills, job_description, use_cache=True):
+        """Analyzes and modifies resume sections using OpenAI."""
+        try:
+            return analyze_resume(summary, experience, skills, job_description, use_cache=use_cache)
+        except MissingAPIKeyError as e:
+            messagebox.showerror("OpenAI API Key Missing", str(e))
             return None
-        except Exception as e:
+        except AnalysisError as e:
             messagebox.showerror("Analysis Error", f"Failed to analyze with OpenAI: {e}")
             return None
+        except Exception as e:
+            if is_openai_error(e):
+                messagebox.showerror("OpenAI Error", f"OpenAI API error: {e}")
+            else:
+                messagebox.showerror("Analysis Error", f"Failed to analyze with OpenAI: {e}")
+            return None
 
     def generate_pdf(self, resume_data):
-        """Sends the resume data to the PDF generator endpoint."""
-        if not PDF_GENERATOR_ENDPOINT or PDF_GENERATOR_ENDPOINT == "YOUR_PDF_GENERATOR_ENDPOINT":
+        """Queues the resume data for the PDF generator."""
+        if not endpoint_configured():
             messagebox.showwarning("PDF Generator", "PDF generator endpoint is not configured.")
             return
 
+        job = self.pdf_queue.submit(resume_data, PDF_OUTPUT_DIR)
+        self.status_var.set(f"PDF job {job['id']} queued ({job['filename']})")
+        self.update_pdf_status()
+
+    def export_all_pdfs(self):
+        """Queues a PDF for every tailored resume in a chosen directory."""
+        if not endpoint_configured():
+            messagebox.showwarning("PDF Generator", "PDF generator endpoint is not configured.")
+            return
+        directory = filedialog.askdirectory(title="Tailored resumes", initialdir=TAILORED_DIR)
+        if not directory:
+            return  # User cancelled
+
         try:
-            first_name, last_name = resume_data['name'].split(' ')[0], resume_data['name'].split(' ')[-1]
-            save_path = f'{first_name}_{last_name}_Resume.pdf'
-            response = requests.post(PDF_GENERATOR_ENDPOINT, json=resume_data)
-            response.raise_for_status()  # Raise an exception for bad status codes
-
-            # try:
-            #     save_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF files", "*.pdf")])
-            # except Exception as e:
-            #     messagebox.showerror("File Dialog Error", f"An error occurred with the file dialog: {e}")
-            #     return
-            
-            if not save_path:
-                return # User cancelled
+            jobs = self.pdf_queue.submit_directory(directory)
+        except OSError as e:
+            messagebox.showerror("PDF Export Error", f"Could not read {directory}: {e}")
+            return
+        if not jobs:
+            messagebox.showinfo("PDF Export", f"No tailored resumes found in {directory}.")
+            return
+        self.status_var.set(f"Queued {len(jobs)} PDFs from {directory}")
+        self.update_pdf_status()
 
-            with open(save_path, 'wb') as f:
-                f.write(response.content)
-            
-            messagebox.showinfo("Success", f"PDF successfully generated and saved to {save_path}")
+    def process_pdf_events(self):
+        """Drains PDF job events on the Tk thread and reschedules itself."""
+        try:
+            while True:
+                kind, job, payload = self.pdf_queue.events.get_nowait()
+                if kind == "done":
+                    self.last_pdf_latency = job["latency"]
+                    if job["batch"] is None:
+                        source = "copied from the PDF cache" if job["cached"] else "successfully generated"
+                        messagebox.showinfo("Success", f"PDF {source} and saved to {payload}")
+                elif kind == "error" and job["batch"] is None:
+                    messagebox.showerror("PDF Generation Error", f"Failed to generate PDF: {payload}")
+                batch = job["batch"]
+                if kind != "started" and batch is not None and batch["finished"] == batch["total"]:
+                    self.status_var.set(
+                        f"PDF export finished: {batch['total'] - batch['failed']}/{batch['total']} generated"
+                    )
+                self.update_pdf_status()
+        except queue.Empty:
+            pass
+        finally:
+            # Keep polling even if handling one event raised
+            self.root.after(WORKER_POLL_MS, self.process_pdf_events)
 
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("PDF Generation Error", f"Failed to generate PDF: {e}")
+    def update_pdf_status(self):
+        """Shows the PDF queue depth, in-flight count and the latest job latency."""
+        in_flight, queued = self.pdf_queue.status()
+        latency = f", last {self.last_pdf_latency:.2f}s" if self.last_pdf_latency is not None else ""
+        self.pdf_status_var.set(f"PDFs: {in_flight} in flight, {queued} queued{latency}")
 
     def trigger_pdf_generation(self):
         """Gets the current resume data from the text box and triggers PDF generation."""
@@ -498,7 +1030,47 @@ class ResumeApp:
             messagebox.showerror("Invalid JSON", "The content of the resume is not valid JSON.")
 
 
-if __name__ == "__main__":
+def report_startup(app, phases):
+    """Prints how long each startup phase took once the catalog and indexes are loaded.
+
+    phases is a list of (name, perf_counter at its end), starting at STARTED_AT.
+    Every phase is also recorded as a startup_* stage in metrics.
+    """
+    if not app.catalog_loaded.is_set():
+        app.root.after(WORKER_POLL_MS, report_startup, app, phases)
+        return
+    ready = "catalog and indexes ready" if app.indexes_ready() else "catalog and indexes failed"
+    phases.append((ready, time.perf_counter()))
+    print("Startup timing (seconds since app.py started):", file=sys.stderr)
+    previous = STARTED_AT
+    for name, at in phases:
+        observe("stage_seconds", at - previous, stage=f"startup_{name.split()[0]}")
+        print(f"  {name:<28}{at - STARTED_AT:8.3f}  (+{at - previous:.3f})", file=sys.stderr)
+        previous = at
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tailor resumes to job descriptions and track the changes.")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print a startup timing breakdown to stderr (combine with python -X importtime "
+                             "for per-module import times)")
+    args = parser.parse_args(argv)
+    phases = [("imports", time.perf_counter())]
+
     root = tk.Tk()
     app = ResumeApp(root)
-    root.mainloop()
\ No newline at end of file
+    phases.append(("widgets built", time.perf_counter()))
+    if args.profile_startup:
+        def first_paint():
+            # Idle callbacks run in order, so the pending redraws are done by now
+            phases.append(("first paint", time.perf_counter()))
+            loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+            print(f"Deferred modules loaded at first paint: {', '.join(loaded) or 'none'}", file=sys.stderr)
+            report_startup(app, phases)
+
+        root.after_idle(first_paint)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""Headless batch analyzer: tailors every resume against every job description.
+
+Usage:
+    python batch.py RESUMES_DIR JOBS_DIR OUTPUT_DIR [--workers N] [--no-cache] [--sharded]
+    python batch.py RESUMES_DIR JOBS_DIR OUTPUT_DIR --offline [--poll-interval SECONDS] [--state-dir DIR]
+
+For each (resume, job description) pair the tailored resume is written to
+OUTPUT_DIR/<resume>__<job>.json and its change log to
+OUTPUT_DIR/<resume>__<job>.changes.json.
+
+With --offline the pairs go through the OpenAI Batch API instead (see
+batch_api): cheaper and not rate limited, but results can take up to 24
+hours. Run the same command again to resume an interrupted offline run.
+"""
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from analyzer import AnalysisError, check_api_key, compare_resumes, get_response_cache, tailor_resume
+from history import get_history
+from http_client import get_openai_client
+
+DEFAULT_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+JOB_DESCRIPTION_EXTENSIONS = (".txt", ".md")
+
+
+def list_resumes(resumes_dir):
+    """Returns the sorted resume JSON paths in resumes_dir."""
+    return sorted(
+        os.path.join(resumes_dir, f) for f in os.listdir(resumes_dir) if f.endswith(".json")
+    )
+
+
+def list_job_descriptions(jobs_dir):
+    """Returns the sorted job description paths in jobs_dir."""
+    return sorted(
+        os.path.join(jobs_dir, f) for f in os.listdir(jobs_dir) if f.endswith(JOB_DESCRIPTION_EXTENSIONS)
+    )
+
+
+def output_stem(resume_path, job_path):
+    """Returns the output file stem for a (resume, job description) pair."""
+    resume_stem = os.path.splitext(os.path.basename(resume_path))[0]
+    job_stem = os.path.splitext(os.path.basename(job_path))[0]
+    return f"{resume_stem}__{job_stem}"
+
+
+def write_result(output_dir, stem, modified_resume_data, changes_log):
+    """Writes a tailored resume and its change log to output_dir."""
+    os.makedirs(output_dir, exist_ok=True)
+    resume_path = os.path.join(output_dir, f"{stem}.json")
+    with open(resume_path, 'w') as f:
+        json.dump(modified_resume_data, f, indent=4)
+    with open(os.path.join(output_dir, f"{stem}.changes.json"), 'w') as f:
+        json.dump(changes_log, f, indent=4)
+    return resume_path
+
+
+def percentile(values, pct):
+    """Returns the nearest-rank percentile of values (0 if values is empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def load_resume(resume_path):
+    """Reads a resume; raises AnalysisError if it cannot be tailored."""
+    try:
+        with open(resume_path, 'r') as f:
+            resume_data = json.load(f)
+    except ValueError as e:  # bad JSON or bad UTF-8
+        raise AnalysisError(f"{resume_path} is not valid JSON: {e}") from e
+    if not isinstance(resume_data, dict):
+        raise AnalysisError(f"{resume_path} is not a JSON object")
+    if not isinstance(resume_data.get("experience", []), list):
+        raise AnalysisError(f"{resume_path}: \"experience\" must be a list")
+    return resume_data
+
+
+def load_job_description(job_path):
+    """Reads a job description; raises AnalysisError if it is not usable text."""
+    try:
+        with open(job_path, 'r') as f:
+            job_description = f.read()
+    except UnicodeDecodeError as e:
+        raise AnalysisError(f"{job_path} is not valid text: {e}") from e
+    if not job_description.strip():
+        raise AnalysisError(f"{job_path} is empty")
+    return job_description
+
+
+def process_pair(resume_path, job_path, output_dir, client, use_cache=True, sharded=False, on_prompt_stats=None):
+    """Tailors one resume to one job description, writes the results and records the run in the history."""
+    original_resume_data = load_resume(resume_path)
+    job_description = load_job_description(job_path)
+
+    modified_resume_data = tailor_resume(
+        original_resume_data, job_description, client=client, use_cache=use_cache, sharded=sharded,
+        on_prompt_stats=on_prompt_stats
+    )
+    changes_log = compare_resumes(original_resume_data, modified_resume_data)
+    saved_path = write_result(output_dir, output_stem(resume_path, job_path), modified_resume_data, changes_log)
+    record_history(resume_path, original_resume_data, modified_resume_data, job_description,
+                   {"source": "batch", "sharded": sharded})
+    return saved_path
+
+
+def record_history(resume_path, original_resume_data, modified_resume_data, job_description, meta):
+    """Records a run whose results are already written; a history failure is only logged."""
+    try:
+        history = get_history()
+        if history is not None:
+            history.record_run(os.path.basename(resume_path), original_resume_data, modified_resume_data,
+                               job_description, meta=meta)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Warning: {os.path.basename(resume_path)} not saved to the history: {e}", file=sys.stderr)
+
+
+def run_batch(resumes_dir, jobs_dir, output_dir, workers=DEFAULT_WORKERS, on_result=None, use_cache=True,
+              sharded=False):
+    """Runs every resume x job description pair through a bounded worker pool.
+
+    on_result, if given, is called with (resume_path, job_path, error, latency,
+    prompt_stats) as each pair finishes; prompt_stats is the compaction report
+    of the request sent (see analyzer.prepare_prompt), or None if no prompt
+    was compacted (cached or sharded). Returns a report dict with counts, throughput,
+    p50/p95 latency in seconds of the pairs that succeeded, and response
+    cache hits/misses.
+    """
+    check_api_key()
+    client = get_openai_client()
+    import openai  # loaded by get_openai_client; not imported at module level so the app starts fast
+    pairs = [(r, j) for r in list_resumes(resumes_dir) for j in list_job_descriptions(jobs_dir)]
+
+    def timed(resume_path, job_path):
+        start = time.perf_counter()
+        prompt_stats = []
+        try:
+            process_pair(resume_path, job_path, output_dir, client, use_cache, sharded, prompt_stats.append)
+            error = None
+        except (AnalysisError, openai.APIError, OSError) as e:
+            error = e
+        return error, time.perf_counter() - start, prompt_stats[-1] if prompt_stats else None
+
+    cache = get_response_cache()
+    hits_before, misses_before = cache.hits, cache.misses
+    latencies = []
+    failures = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(timed, r, j): (r, j) for r, j in pairs}
+        for future in as_completed(futures):
+            resume_path, job_path = futures[future]
+            error, latency, prompt_stats = future.result()
+            if error is None:
+                latencies.append(latency)  # failures (often instant input errors) would skew the percentiles
+            else:
+                failures.append({"resume": resume_path, "job": job_path, "error": str(error)})
+            if on_result:
+                on_result(resume_path, job_path, error, latency, prompt_stats)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "pairs": len(pairs),
+        "succeeded": len(pairs) - len(failures),
+        "failed": len(failures),
+        "failures": failures,
+        "elapsed": elapsed,
+        "throughput": len(pairs) / elapsed if elapsed > 0 else 0.0,
+        "p50_latency": percentile(latencies, 50),
+        "p95_latency": percentile(latencies, 95),
+        "cache_hits": cache.hits - hits_before,
+        "cache_misses": cache.misses - misses_before,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tailor every resume against every job description.")
+    parser.add_argument("resumes_dir", help="directory of resume JSON files")
+    parser.add_argument("jobs_dir", help="directory of job description .txt/.md files")
+    parser.add_argument("output_dir", help="directory for tailored resumes and change logs")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="number of concurrent requests")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the response cache")
+    parser.add_argument("--sharded", action="store_true", help="tailor each section with its own concurrent request")
+    parser.add_argument("--offline", action="store_true",
+                        help="submit every pair as one OpenAI Batch API job and wait for it (resumable)")
+    parser.add_argument("--poll-interval", type=float, help="seconds between batch status checks with --offline")
+    parser.add_argument("--state-dir", help="checkpoint directory for --offline (default: OUTPUT_DIR/.batch)")
+    args = parser.parse_args(argv)
+    if args.offline:
+        if args.sharded:
+            parser.error("--sharded cannot be combined with --offline")
+        return run_offline(args)
+
+    def report_progress(resume_path, job_path, error, latency, prompt_stats):
+        status = f"FAILED: {error}" if error else "ok"
+        tokens = ""
+        if prompt_stats:
+            tokens = f", prompt {prompt_stats['tokens_before']} -> {prompt_stats['tokens_after']} tokens"
+        print(f"{output_stem(resume_path, job_path)}: {status} ({latency:.2f}s{tokens})", flush=True)
+
+    try:
+        report = run_batch(
+            args.resumes_dir, args.jobs_dir, args.output_dir, args.workers, report_progress,
+            use_cache=not args.no_cache, sharded=args.sharded
+        )
+    except AnalysisError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(
+        f"\n{report['succeeded']}/{report['pairs']} pairs tailored in {report['elapsed']:.2f}s "
+        f"({report['throughput']:.2f} pairs/s), "
+        f"p50 {report['p50_latency']:.2f}s, p95 {report['p95_latency']:.2f}s of successful pairs, "
+        f"{report['failed']} failed, cache {report['cache_hits']} hits / {report['cache_misses']} misses"
+    )
+    return 0 if report["failed"] == 0 else 1
+
+
+def run_offline(args):
+    """Runs the --offline mode of main and prints its report."""
+    from batch_api import BATCH_POLL_INTERVAL, run_offline_batch  # batch_api imports this module
+
+    def report_status(batch):
+        counts = batch.request_counts
+        progress = f"{counts.completed + counts.failed}/{counts.total} done" if counts else ""
+        print(f"Batch {batch.id}: {batch.status} {progress}", flush=True)
+
+    try:
+        report = run_offline_batch(
+            args.resumes_dir, args.jobs_dir, args.output_dir, state_dir=args.state_dir,
+            use_cache=not args.no_cache, poll_interval=args.poll_interval or BATCH_POLL_INTERVAL,
+            on_status=report_status
+        )
+    except AnalysisError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for failure in report["failures"]:
+        print(f"{output_stem(failure['resume'], failure['job'])}: FAILED: {failure['error']}")
+    print(f"\n{report['succeeded']}/{report['pairs']} pairs tailored "
+          f"({report['cached']} from the cache, {report['submitted']} through batch {report['batch_id']}: "
+          f"{report['status']})")
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""Offline tailoring through the OpenAI Batch API, for large overnight runs.
+
+run_offline_batch() tailors every resume against every job description like
+batch.run_batch, but instead of one synchronous request per pair it:
+
+1. builds a JSONL file with one chat completion request per pair, from the
+   same compacted prompt analyze_resume sends (pairs already in the response
+   cache are written straight away and left out),
+2. uploads it through the files endpoint and creates a batch,
+3. polls the batch every poll_interval seconds,
+4. downloads the output file and parses it line by line into tailored
+   resumes and change logs (see batch.write_result), which also go to the
+   response cache and the tailoring history.
+
+Every step is checkpointed to a state file in state_dir, and the outcome of
+every pair is appended to a journal before its history is recorded, so
+running the same command again after a crash or Ctrl+C picks up where it
+stopped: it never uploads or submits twice, and results already written are
+neither written nor recorded again. Once every pair is accounted for, the
+run's files move to state_dir/runs/<batch id>, so the next run with the same
+arguments starts a new batch from the current inputs.
+"""
+import json
+import os
+import time
+
+from analyzer import (
+    OPENAI_MODEL, AnalysisError, apply_modified_sections, chat_messages, check_api_key, compare_resumes,
+    get_response_cache, merge_experience, parse_json_response, prepare_prompt, response_cache_key
+)
+from batch import (
+    list_job_descriptions, list_resumes, load_job_description, load_resume, output_stem, record_history, write_result
+)
+from cache import hash_key
+from http_client import get_openai_client
+
+# --- Configuration ---
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "30"))
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_ENDPOINT = "/v1/chat/completions"
+STATE_DIR_NAME = ".batch"
+ARCHIVE_DIR_NAME = "runs"
+RUN_FILES = ("requests.jsonl", "output.jsonl", "errors.jsonl", "done.jsonl", "state.json")  # state.json last
+STATE_VERSION = 2
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+def _load_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _sections(resume_data, job_description):
+    return (
+        resume_data.get("summary", ""),
+        resume_data.get("experience", []),
+        resume_data.get("skills", []),
+        job_description
+    )
+
+
+class BatchState:
+    """The checkpoint of one offline batch run.
+
+    state.json is saved atomically after every step; the outcome of each pair
+    goes to the append-only done.jsonl as soon as its files are written.
+    """
+
+    def __init__(self, state_dir):
+        self.state_dir = state_dir
+        self.path = os.path.join(state_dir, "state.json")
+        self.journal_path = os.path.join(state_dir, "done.jsonl")
+        self.data = {"version": STATE_VERSION, "requests": {}, "invalid": []}
+        if os.path.exists(self.path):
+            data = _load_json(self.path)
+            if data.get("version") == STATE_VERSION:
+                self.data = data
+        self.done = set()
+        self.failed = {}
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line torn by a crash; that pair is processed again
+                    self.done.add(entry["id"])
+                    if "error" in entry:
+                        self.failed[entry["id"]] = entry["error"]
+
+    def __getitem__(self, key):
+        return self.data.get(key)
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def file(self, name):
+        return os.path.join(self.state_dir, name)
+
+    def mark_done(self, custom_id, error=None):
+        """Appends the outcome of one pair to the journal; pass error if it failed."""
+        entry = {"id": custom_id}
+        if error is not None:
+            entry["error"] = self.failed[custom_id] = str(error)
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(self.journal_path, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+        self.done.add(custom_id)
+
+    def mark_invalid(self, resume_path, job_path, error):
+        """Records a pair that was left out of the batch because an input could not be read."""
+        self.data["invalid"].append({"resume": resume_path, "job": job_path, "error": str(error)})
+
+    def archive(self):
+        """Moves the files of a finished run to runs/<batch id> and returns that directory."""
+        name = self.data.get("batch_id") or time.strftime("cached-%Y%m%d-%H%M%S")
+        archive_dir = os.path.join(self.state_dir, ARCHIVE_DIR_NAME, name)
+        os.makedirs(archive_dir, exist_ok=True)
+        for filename in RUN_FILES:
+            if os.path.exists(self.file(filename)):
+                os.replace(self.file(filename), os.path.join(archive_dir, filename))
+        return archive_dir
+
+    def save(self):
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+
+def build_requests(state, resumes_dir, jobs_dir, output_dir, use_cache=True):
+    """Writes the batch input JSONL and records every pair in state; returns (requests, cached) counts.
+
+    Pairs whose response is already cached are written to output_dir now and
+    are not part of the batch. Pairs with an unreadable or malformed resume or
+    job description are left out and recorded with state.mark_invalid.
+    """
+    cache = get_response_cache() if use_cache else None
+    requests_path = state.file("requests.jsonl")
+    count = cached = 0
+    state["invalid"] = []
+    jobs = []
+    for job_path in list_job_descriptions(jobs_dir):
+        try:
+            jobs.append((job_path, load_job_description(job_path), None))
+        except (AnalysisError, OSError) as e:
+            jobs.append((job_path, None, e))
+    with open(requests_path + ".part", 'w') as f:
+        for resume_path in list_resumes(resumes_dir):
+            try:
+                resume_data, resume_error = load_resume(resume_path), None
+            except (AnalysisError, OSError) as e:
+                resume_data, resume_error = None, e
+            for job_path, job_description, job_error in jobs:
+                if resume_error or job_error:
+                    state.mark_invalid(resume_path, job_path, resume_error or job_error)
+                    continue
+                sections = _sections(resume_data, job_description)
+                custom_id = hash_key(resume_path, job_path)[:32]
+                if custom_id in state.done:  # served from the cache before a crash
+                    cached += 1
+                    continue
+                if cache is not None:
+                    modified_sections = cache.get_json(response_cache_key(*sections))
+                    if modified_sections is not None:
+                        save_result(state, custom_id, resume_path, job_path, resume_data, job_description,
+                                    modified_sections, output_dir)
+                        cached += 1
+                        continue
+
+                prompt, prompt_stats = prepare_prompt(*sections)
+                f.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": {"model": OPENAI_MODEL, "response_format": {"type": "json_object"},
+                             "messages": chat_messages(prompt)},
+                }) + "\n")
+                state["requests"][custom_id] = {
+                    "resume": resume_path,
+                    "job": job_path,
+                    "resume_hash": hash_key(resume_data),
+                    "sent_indexes": prompt_stats["experience_indexes"],
+                    "tokens_before": prompt_stats["tokens_before"],
+                    "tokens_after": prompt_stats["tokens_after"],
+                }
+                count += 1
+    os.replace(requests_path + ".part", requests_path)
+    state["cached"] = cached
+    return count, cached
+
+
+def save_result(state, custom_id, resume_path, job_path, resume_data, job_description, modified_sections,
+                output_dir):
+    """Writes one tailored resume and its change log, marks the pair done, then records it in the history.
+
+    The pair is journaled before the history write, so a crash in between
+    loses at most that history entry instead of recording it twice.
+    """
+    modified_resume_data = apply_modified_sections(resume_data, modified_sections)
+    changes_log = compare_resumes(resume_data, modified_resume_data)
+    write_result(output_dir, output_stem(resume_path, job_path), modified_resume_data, changes_log)
+    state.mark_done(custom_id)
+    record_history(resume_path, resume_data, modified_resume_data, job_description, {"source": "batch_api"})
+
+
+def download_file(client, file_id, path):
+    """Streams a file from the files endpoint to path, via a .part file."""
+    with client.files.with_streaming_response.content(file_id) as response, open(path + ".part", 'wb') as f:
+        for chunk in response.iter_bytes():
+            f.write(chunk)
+    os.replace(path + ".part", path)
+
+
+def parse_results(state, output_path, output_dir, use_cache=True):
+    """Turns every not yet processed line of a batch output file into a tailored resume.
+
+    Reads the file one line at a time, so memory use does not grow with the
+    batch size, and journals every pair as it is done (see BatchState).
+    Lines that are not valid results are counted in state["bad_lines"]; their
+    pairs stay unprocessed and are reported as failed by run_offline_batch.
+    """
+    cache = get_response_cache() if use_cache else None
+    parsed = 0
+    with open(output_path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                result = json.loads(line)
+                custom_id = result.get("custom_id")
+                request = state["requests"].get(custom_id)
+            except (ValueError, AttributeError, TypeError):
+                state["bad_lines"] = (state["bad_lines"] or 0) + 1
+                continue
+            if request is None or custom_id in state.done:
+                continue
+            try:
+                response = result.get("response") or {}
+                if result.get("error") or response.get("status_code") != 200:
+                    error = result.get("error") or (response.get("body") or {}).get("error") or {}
+                    raise AnalysisError(error.get("message") if isinstance(error, dict) and error.get("message")
+                                        else f"request failed with status {response.get('status_code')}")
+                resume_data = load_resume(request["resume"])
+                if hash_key(resume_data) != request["resume_hash"]:
+                    raise AnalysisError("resume changed after the batch was submitted")
+                job_description = load_job_description(request["job"])
+                modified_sections = parse_json_response(response["body"]["choices"][0]["message"]["content"])
+                sections = _sections(resume_data, job_description)
+                if isinstance(modified_sections.get("experience"), list):
+                    modified_sections["experience"] = merge_experience(
+                        sections[1], request["sent_indexes"], modified_sections["experience"]
+                    )
+                if cache is not None:
+                    cache.put_json(response_cache_key(*sections), modified_sections)
+                save_result(state, custom_id, request["resume"], request["job"], resume_data, job_description,
+                            modified_sections, output_dir)
+            except (AnalysisError, OSError, KeyError, IndexError, TypeError, AttributeError, ValueError) as e:
+                state.mark_done(custom_id, e)
+            parsed += 1
+    state.save()
+    return parsed
+
+
+def run_offline_batch(resumes_dir, jobs_dir, output_dir, state_dir=None, client=None, use_cache=True,
+                      poll_interval=BATCH_POLL_INTERVAL, on_status=None):
+    """Tailors every resume x job description pair through the Batch API and returns a report.
+
+    state_dir (default OUTPUT_DIR/.batch) holds the checkpoint, the request
+    file and the downloaded results; call again with the same arguments to
+    resume an interrupted run. on_status, if given, is called with every
+    polled batch object. A finished run is archived (see BatchState.archive),
+    so calling again afterwards tailors the current inputs in a new batch.
+    """
+    check_api_key()
+    client = client or get_openai_client()
+    state = BatchState(state_dir or os.path.join(output_dir, STATE_DIR_NAME))
+    os.makedirs(state.state_dir, exist_ok=True)
+
+    if state["requests_built"] is None:
+        state["requests_built"] = build_requests(state, resumes_dir, jobs_dir, output_dir, use_cache)[0]
+        state.save()
+
+    if state["requests_built"] and state["input_file_id"] is None:
+        with open(state.file("requests.jsonl"), 'rb') as f:
+            uploaded = client.files.create(file=("requests.jsonl", f), purpose="batch")
+        state["input_file_id"] = uploaded.id
+        state.save()
+
+    if state["input_file_id"] and state["batch_id"] is None:
+        batch = client.batches.create(input_file_id=state["input_file_id"], endpoint=BATCH_ENDPOINT,
+                                      completion_window=BATCH_COMPLETION_WINDOW)
+        state["batch_id"] = batch.id
+        state.save()
+
+    batch = None
+    while state["batch_id"]:
+        batch = client.batches.retrieve(state["batch_id"])
+        state["status"] = batch.status
+        if batch.request_counts is not None:
+            state["request_counts"] = batch.request_counts.model_dump()
+        state.save()
+        if on_status:
+            on_status(batch)
+        if batch.status in TERMINAL_STATUSES:
+            break
+        time.sleep(poll_interval)
+
+    if batch is not None:
+        state["bad_lines"] = 0
+        for key, name in (("output_file_id", "output.jsonl"), ("error_file_id", "errors.jsonl")):
+            file_id = getattr(batch, key)
+            if file_id and not os.path.exists(state.file(name)):
+                download_file(client, file_id, state.file(name))
+            if file_id:
+                parse_results(state, state.file(name), output_dir, use_cache)
+        reason = "no valid result for this request in the batch output"
+        if batch.status != "completed":
+            reason = f"batch {batch.status}"
+            if batch.errors is not None and batch.errors.data:
+                reason += f": {batch.errors.data[0].message}"
+        for custom_id in state["requests"]:
+            if custom_id not in state.done:
+                state.mark_done(custom_id, reason)
+        state.save()
+
+    failures = [
+        {"resume": state["requests"][custom_id]["resume"], "job": state["requests"][custom_id]["job"], "error": error}
+        for custom_id, error in state.failed.items() if custom_id in state["requests"]
+    ]
+    submitted = len(state["requests"])
+    invalid = state["invalid"] or []
+    archived_to = state.archive()
+    return {
+        "pairs": submitted + (state["cached"] or 0) + len(invalid),
+        "cached": state["cached"] or 0,
+        "submitted": submitted,
+        "succeeded": submitted - len(failures) + (state["cached"] or 0),
+        "failed": len(failures) + len(invalid),
+        "failures": invalid + failures,
+        "bad_lines": state["bad_lines"] or 0,
+        "batch_id": state["batch_id"],
+        "status": state["status"] or ("completed" if not submitted else None),
+        "archived_to": archived_to,
+    }
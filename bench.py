@@ -0,0 +1,383 @@
+"""Benchmarks for the analyze -> diff -> highlight -> PDF pipeline.
+
+Usage:
+    python bench.py [--sizes 10,100,1000,10000] [--repeat 3] [--output bench_results.json]
+                    [--compare OLD.json] [--skip-gui] [--latency 0.2] [--tokens-per-second 200]
+
+Everything runs locally: analysis goes to fake_servers.FakeOpenAIServer and
+PDFs to fake_servers.StubPdfServer, and all caches live in a temporary
+directory. Synthetic resumes are generated from a fixed seed so runs are
+comparable. Results are written as JSON; pass --compare with the results of
+an earlier version to print the change of every metric.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Never use a real API key or the user's caches while benchmarking
+BENCH_DIR = tempfile.mkdtemp(prefix="resume-bench-")
+os.environ["ANALYZER_CACHE_DIR"] = os.path.join(BENCH_DIR, "cache")
+os.environ["OPENAI_API_KEY"] = "bench"
+
+import openai
+
+from analyzer import analyze_resume, compare_resumes
+from batch import percentile
+from catalog import ResumeCatalog
+from fake_servers import FakeOpenAIServer, StubPdfServer
+from json_index import LineIndex, change_spans, dumps_with_index
+from pdf_jobs import PdfJobQueue
+from sharding import analyze_resume_sharded
+
+# --- Configuration ---
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+DEFAULT_REPEAT = 3
+CATALOG_SIZES = (100, 1000)
+ANALYSIS_RUNS = 5
+ANALYSIS_ENTRIES = 8
+PDF_JOBS = 20
+PDF_CONCURRENCY_LEVELS = (1, 2, 4)
+REGRESSION_THRESHOLD = 1.2
+MIN_COMPARED_SECONDS = 0.001  # faster timings are too noisy to compare
+
+WORDS = (
+    "python data pipeline kafka aws kubernetes docker terraform react api latency throughput cost customers "
+    "designed built led migrated reduced improved automated scaled launched mentored platform service team"
+).split()
+
+
+def synthetic_resume(entries, seed=0):
+    """Returns a resume with the given number of experience entries."""
+    rng = random.Random(seed)
+
+    def sentence(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+    return {
+        "name": "Bench Candidate",
+        "email": "bench@example.com",
+        "summary": sentence(40),
+        "experience": [
+            {
+                "title": f"Engineer {i}",
+                "company": f"Company {i % 97}",
+                "dates": f"{2000 + i % 25}-{2001 + i % 25}",
+                "description": sentence(30),
+                "achievements": [sentence(12) for _ in range(3)],
+            }
+            for i in range(entries)
+        ],
+        "skills": {"Languages": ["Python", "SQL", "Go"], "Cloud": ["AWS", "GCP"], "Tools": ["Docker", "Kafka"]},
+    }
+
+
+def synthetic_modification(resume_data, seed=1):
+    """Returns a tailored-looking copy: edited, inserted, removed and moved entries."""
+    rng = random.Random(seed)
+    modified = json.loads(json.dumps(resume_data))
+    modified["summary"] += " Tailored to the role."
+    experience = modified["experience"]
+    for entry in experience[::10]:
+        entry["description"] += " Delivered measurable impact."
+    for _ in range(max(1, len(experience) // 100)):
+        if experience:
+            experience.pop(rng.randrange(len(experience)))
+        experience.insert(rng.randrange(len(experience) + 1), {"title": "Inserted role", "description": "New."})
+    if len(experience) > 2:
+        experience.insert(0, experience.pop(len(experience) // 2))
+    modified["skills"]["Tools"].append("Terraform")
+    return modified
+
+
+def measure(fn, repeat):
+    """Runs fn repeat times and returns {"median", "min"} seconds and its last result."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times)}, result
+
+
+def bench_pipeline(sizes, repeat):
+    """Times pretty-printing, diffing and highlight span computation by resume size."""
+    results = {}
+    for size in sizes:
+        original = synthetic_resume(size)
+        modified = synthetic_modification(original)
+        row = {}
+        row["json_dumps"], _ = measure(lambda: json.dumps(modified, indent=4), repeat)
+        row["dumps_with_index"], (text, index) = measure(lambda: dumps_with_index(modified), repeat)
+        row["compare_resumes"], changes = measure(lambda: compare_resumes(original, modified), repeat)
+
+        def highlight_spans():
+            line_index = LineIndex(text)
+            return [(tag, line_index.tk_index(s), line_index.tk_index(e)) for tag, s, e in change_spans(changes, index)]
+
+        row["highlight_spans"], spans = measure(highlight_spans, repeat)
+        row["changes"] = len(changes)
+        row["highlighted"] = len(spans)
+        row["text_chars"] = len(text)
+        results[str(size)] = row
+        print(f"pipeline {size:>6} entries: diff {row['compare_resumes']['median'] * 1000:8.1f} ms, "
+              f"spans {row['highlight_spans']['median'] * 1000:8.1f} ms", flush=True)
+    return results
+
+
+def bench_gui(sizes, repeat):
+    """Times rendering and highlighting in a real (hidden) ResumeApp window."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:  # no display available
+        return {"skipped": str(e)}
+
+    from app import ResumeApp
+    root.withdraw()
+    app = ResumeApp(root)
+    results = {}
+    try:
+        for size in sizes:
+            original = synthetic_resume(size)
+            modified = synthetic_modification(original)
+            row = {}
+            row["render_resume_json"], _ = measure(lambda: app.render_resume_json(modified), repeat)
+            row["compare_and_highlight_changes"], _ = measure(
+                lambda: app.compare_and_highlight_changes(original, modified), repeat
+            )
+            row["highlight_json_changes"], _ = measure(app.highlight_json_changes, repeat)
+            results[str(size)] = row
+            print(f"gui      {size:>6} entries: highlight {row['compare_and_highlight_changes']['median'] * 1000:8.1f} ms",
+                  flush=True)
+    finally:
+        root.destroy()
+    return results
+
+
+STARTUP_SCRIPT = (
+    "import sys, time; start = time.perf_counter(); import app; "
+    "print(time.perf_counter() - start); print(','.join(m for m in app.DEFERRED_MODULES if m in sys.modules))"
+)
+
+
+def bench_startup(repeat):
+    """Times a cold `import app` in fresh interpreters and lists the deferred modules it loaded."""
+    times = []
+    loaded = ""
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+        times.append(float(output[0]))
+        loaded = output[1] if len(output) > 1 else ""
+    results = {"import_app": {"median": statistics.median(times), "min": min(times)},
+               "deferred_modules_loaded": loaded.split(",") if loaded else []}
+    print(f"startup  import app: {results['import_app']['median'] * 1000:8.1f} ms "
+          f"(deferred modules loaded: {loaded or 'none'})", flush=True)
+    return results
+
+
+def bench_catalog(counts, repeat):
+    """Times cold and warm resume catalog loads for directories of growing size."""
+    results = {}
+    for count in counts:
+        directory = os.path.join(BENCH_DIR, f"resumes-{count}")
+        os.makedirs(directory, exist_ok=True)
+        for i in range(count):
+            resume_data = synthetic_resume(5, seed=i)
+            resume_data["name"] = f"Candidate {i}"
+            with open(os.path.join(directory, f"resume_{i}.json"), 'w') as f:
+                json.dump(resume_data, f)
+
+        index_path = os.path.join(BENCH_DIR, f"catalog-{count}.json")
+
+        def cold():
+            if os.path.exists(index_path):
+                os.remove(index_path)
+            return ResumeCatalog(directory, index_path).refresh()
+
+        row = {}
+        row["cold_refresh"], _ = measure(cold, repeat)
+        row["warm_refresh"], _ = measure(lambda: ResumeCatalog(directory, index_path).refresh(), repeat)
+        catalog = ResumeCatalog(directory, index_path)
+        row["search"], _ = measure(lambda: catalog.search("candidate 1"), repeat)
+        results[str(count)] = row
+        print(f"catalog  {count:>6} files:   cold {row['cold_refresh']['median'] * 1000:8.1f} ms, "
+              f"warm {row['warm_refresh']['median'] * 1000:8.1f} ms", flush=True)
+    return results
+
+
+def bench_analysis(latency, tokens_per_second, runs=ANALYSIS_RUNS, entries=ANALYSIS_ENTRIES):
+    """Times end-to-end analysis against the fake OpenAI server."""
+    resume_data = synthetic_resume(entries)
+    sections = (resume_data["summary"], resume_data["experience"], resume_data["skills"],
+                "Senior data engineer: Python, Kafka, AWS, Kubernetes. Build low-latency pipelines.")
+    results = {"config": {"latency": latency, "tokens_per_second": tokens_per_second, "entries": entries}}
+    with FakeOpenAIServer(latency, tokens_per_second) as server:
+        client = openai.OpenAI(base_url=server.base_url, api_key="bench", max_retries=0)
+
+        def run(mode):
+            first = []
+            start = time.perf_counter()
+
+            def on_section(event):
+                if not first:
+                    first.append(time.perf_counter() - start)
+
+            if mode == "sharded":
+                analyze_resume_sharded(*sections, client=client, use_cache=False, on_section=on_section)
+            else:
+                analyze_resume(*sections, client=client, use_cache=False,
+                               on_section=on_section if mode == "streamed" else None)
+            total = time.perf_counter() - start
+            return total, first[0] if first else total
+
+        for mode in ("blocking", "streamed", "sharded"):
+            totals, firsts = zip(*(run(mode) for _ in range(runs)))
+            results[mode] = {
+                "p50": percentile(totals, 50),
+                "p95": percentile(totals, 95),
+                "first_content_p50": percentile(firsts, 50),
+            }
+            print(f"analysis {mode:>8}: p50 {results[mode]['p50']:.2f}s, "
+                  f"first content {results[mode]['first_content_p50']:.2f}s", flush=True)
+        results["requests"] = server.requests
+    return results
+
+
+def bench_pdf(latency, size, jobs=PDF_JOBS, levels=PDF_CONCURRENCY_LEVELS):
+    """Measures PDF throughput against the stub generator at several concurrency levels."""
+    resume_data = synthetic_resume(5)
+    results = {"config": {"latency": latency, "size": size, "jobs": jobs}}
+    with StubPdfServer(latency, size) as server:
+        for workers in levels:
+            output_dir = os.path.join(BENCH_DIR, f"pdfs-{workers}")
+            pdf_queue = PdfJobQueue(server.url, max_workers=workers, use_cache=False)
+            start = time.perf_counter()
+            for _ in range(jobs):
+                pdf_queue.submit(resume_data, output_dir)
+            pdf_queue.shutdown()
+            elapsed = time.perf_counter() - start
+            latencies = []
+            failed = 0
+            while not pdf_queue.events.empty():
+                kind, job, _ = pdf_queue.events.get()
+                if kind == "done":
+                    latencies.append(job["latency"])
+                elif kind == "error":
+                    failed += 1
+            results[str(workers)] = {
+                "pdfs_per_second": jobs / elapsed,
+                "megabytes_per_second": jobs * size / elapsed / 1e6,
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "failed": failed,
+            }
+            print(f"pdf      {workers} workers: {results[str(workers)]['pdfs_per_second']:.1f} PDFs/s", flush=True)
+    return results
+
+
+def git_commit():
+    """Returns the current git commit hash, or None outside a checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(value, prefix=""):
+    """Returns {"a.b.c": number} for every numeric leaf of a results dict."""
+    if isinstance(value, dict):
+        flat = {}
+        for key, child in value.items():
+            flat.update(flatten(child, f"{prefix}.{key}" if prefix else str(key)))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def compare(old_results, new_results, threshold=REGRESSION_THRESHOLD):
+    """Prints every timing and throughput metric next to its previous value; returns the regressions."""
+    old, new = flatten(old_results.get("results", {})), flatten(new_results.get("results", {}))
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        if ".config." in key:
+            continue
+        higher_is_better = key.endswith("per_second")
+        is_time = key.rsplit(".", 1)[-1] in ("median", "min", "p50", "p95", "first_content_p50")
+        if not (higher_is_better or is_time) or old[key] <= 0:
+            continue
+        if is_time and max(old[key], new[key]) < MIN_COMPARED_SECONDS:
+            continue
+        ratio = new[key] / old[key]
+        slower = ratio < 1 / threshold if higher_is_better else ratio > threshold
+        if slower:
+            regressions.append(key)
+        print(f"{'REGRESSION ' if slower else '           '}{key}: {old[key]:.4g} -> {new[key]:.4g} ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the resume analysis pipeline.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated numbers of experience entries")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per measurement")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--skip-gui", action="store_true", help="skip the Tk rendering benchmarks")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake OpenAI/PDF server latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="fake OpenAI generation speed")
+    parser.add_argument("--pdf-size", type=int, default=100_000, help="stub PDF size in bytes")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    try:
+        results = {
+            "startup": bench_startup(args.repeat),
+            "pipeline": bench_pipeline(sizes, args.repeat),
+            "gui": {"skipped": "--skip-gui"} if args.skip_gui else bench_gui(sizes, args.repeat),
+            "catalog": bench_catalog(CATALOG_SIZES, args.repeat),
+            "analysis": bench_analysis(args.latency, args.tokens_per_second),
+            "pdf": bench_pdf(args.latency / 2, args.pdf_size),
+        }
+    finally:
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            regressions = compare(json.load(f), report)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {REGRESSION_THRESHOLD:.1f}x")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
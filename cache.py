@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+# --- Configuration ---
+CACHE_DIR = os.getenv("ANALYZER_CACHE_DIR", ".cache")
+INDEX_FILENAME = "index.json"
+INDEX_SAVE_INTERVAL = 5.0  # seconds between index writes; flush() writes pending changes
+
+
+def hash_key(*parts):
+    """Returns a stable sha256 hex digest for the given JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """A persistent, thread-safe LRU cache of byte blobs keyed by content hash.
+
+    Each entry is stored as <directory>/<key><suffix>. An index file keeps the
+    size and last access time of every entry so the LRU order and the byte
+    budget survive restarts without re-statting the whole directory. Entries
+    older than max_age seconds (by last access) are dropped as well.
+
+    The index is rewritten at most every INDEX_SAVE_INTERVAL seconds and on
+    flush(); entry files written since the last save are picked up again
+    from the directory on the next start, so a crash loses no entries.
+    """
+
+    def __init__(self, directory, max_bytes, max_age=None, suffix=".bin"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._last_index_save = 0.0
+        self._dirty = False
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._load_index()
+        self._bytes = sum(entry["size"] for entry in self._index.values())
+        with self._lock:
+            self._evict()
+            if self._dirty:
+                self._save_index()
+
+    def path_for(self, key):
+        """Returns the file path an entry with this key is stored at."""
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        """Returns the cached bytes for key, or None on a miss."""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or self._expired(entry):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            try:
+                with open(self.path_for(key), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(key)
+            return data
+
+    def put(self, key, data):
+        """Stores bytes under key, evicting least recently used entries if needed."""
+        with self._lock:
+            tmp_path = self.path_for(key) + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path_for(key))
+            self._add(key, len(data))
+
+    def get_path(self, key):
+        """Returns the path of the cached file for key, or None on a miss.
+
+        Counts as an access like get(), but leaves reading the file to the
+        caller so large entries can be copied without loading them.
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or self._expired(entry) or not os.path.exists(self.path_for(key)):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(key)
+            return self.path_for(key)
+
+    def put_file(self, key, source_path):
+        """Stores a copy of the file at source_path under key."""
+        with self._lock:
+            tmp_path = self.path_for(key) + ".tmp"
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, self.path_for(key))
+            self._add(key, os.path.getsize(self.path_for(key)))
+
+    def get_json(self, key):
+        """Returns the cached JSON value for key, or None on a miss."""
+        data = self.get(key)
+        return None if data is None else json.loads(data.decode("utf-8"))
+
+    def put_json(self, key, value):
+        """Stores a JSON-serializable value under key."""
+        self.put(key, json.dumps(value).encode("utf-8"))
+
+    def clear(self):
+        """Removes every entry and resets the hit/miss counters."""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self.hits = self.misses = 0
+            self._save_index()
+
+    def flush(self):
+        """Writes the index to disk if it changed since the last save."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def stats(self):
+        """Returns a dict with hit/miss counters, entry count and total bytes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._index),
+                "bytes": self._bytes,
+            }
+
+    def _expired(self, entry):
+        return self.max_age is not None and time.time() - entry["accessed"] > self.max_age
+
+    def _touch(self, key):
+        self._index[key]["accessed"] = time.time()
+        self._changed()
+
+    def _add(self, key, size):
+        self._bytes -= self._index.get(key, {}).get("size", 0)
+        self._index[key] = {"size": size, "accessed": time.time()}
+        self._bytes += size
+        self._evict()
+        self._changed()
+
+    def _changed(self):
+        self._dirty = True
+        if time.time() - self._last_index_save >= INDEX_SAVE_INTERVAL:
+            self._save_index()
+
+    def _remove(self, key):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry["size"]
+            self._dirty = True
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        for key in [k for k, entry in self._index.items() if self._expired(entry)]:
+            self._remove(key)
+        if self._bytes <= self.max_bytes:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k]["accessed"]):
+            self._remove(key)
+            if self._bytes <= self.max_bytes:
+                break
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILENAME), 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        # Drop entries whose files were removed behind our back, and adopt
+        # files written after the last index save (by their modification time)
+        files = {}
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if e.is_file() and e.name.endswith(self.suffix) and e.name != INDEX_FILENAME:
+                    files[e.name[:-len(self.suffix)] if self.suffix else e.name] = e
+        loaded = {}
+        for key, e in files.items():
+            entry = index.get(key)
+            if entry is None:
+                stat = e.stat()
+                entry = {"size": stat.st_size, "accessed": stat.st_mtime}
+                self._dirty = True
+            loaded[key] = entry
+        if len(loaded) != len(index):
+            self._dirty = True
+        return loaded
+
+    def _save_index(self):
+        index_path = os.path.join(self.directory, INDEX_FILENAME)
+        with open(index_path + ".tmp", 'w') as f:
+            json.dump(self._index, f)
+        os.replace(index_path + ".tmp", index_path)
+        self._last_index_save = time.time()
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+
+from cache import CACHE_DIR
+
+CATALOG_VERSION = 1
+
+
+def default_index_path(resumes_dir):
+    """Returns the catalog index file used for a resumes directory."""
+    digest = hashlib.sha256(os.path.abspath(resumes_dir).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f"catalog-{digest}.json")
+
+
+class ResumeCatalog:
+    """A persistent index of the resume JSON files in a directory.
+
+    Every entry records the file's display name, path, mtime, size and
+    content hash. refresh() only stats the directory and re-reads files whose
+    mtime or size changed, so a warm start over thousands of resumes does not
+    parse any JSON. Display labels are unique (duplicate names get the file
+    name appended) and map back to their file in O(1).
+    """
+
+    def __init__(self, resumes_dir, index_path=None):
+        self.resumes_dir = resumes_dir
+        self.index_path = index_path or default_index_path(resumes_dir)
+        self.entries = {}
+        self._labels = {}    # label -> file name
+        self._label_of = {}  # file name -> label
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def refresh(self):
+        """Rescans the directory and returns (added, updated, removed) file names."""
+        os.makedirs(self.resumes_dir, exist_ok=True)
+        with os.scandir(self.resumes_dir) as it:
+            stats = {e.name: e.stat() for e in it if e.is_file() and e.name.endswith(".json")}
+
+        with self._lock:
+            known = dict(self.entries)
+        added, updated = [], []
+        for filename, stat in stats.items():
+            entry = known.get(filename)
+            if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                continue
+            new_entry = self._read_entry(filename, stat)
+            with self._lock:
+                self.entries[filename] = new_entry
+            (updated if entry else added).append(filename)
+
+        removed = [filename for filename in known if filename not in stats]
+        with self._lock:
+            for filename in removed:
+                self.entries.pop(filename, None)
+            self._rebuild_labels()
+        if added or updated or removed:
+            self._save_index()
+        return added, updated, removed
+
+    def update_files(self, filenames):
+        """Re-reads only the given files, dropping the ones that no longer exist.
+
+        Files whose mtime and size still match the catalog are not reopened.
+        Returns (added, updated, removed) like refresh().
+        """
+        added, updated, removed = [], [], []
+        for filename in filenames:
+            try:
+                stat = os.stat(self.path_for(filename))
+            except FileNotFoundError:
+                with self._lock:
+                    if self.entries.pop(filename, None) is not None:
+                        removed.append(filename)
+                continue
+            with self._lock:
+                entry = self.entries.get(filename)
+            if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                continue
+            new_entry = self._read_entry(filename, stat)
+            with self._lock:
+                self.entries[filename] = new_entry
+            (updated if entry else added).append(filename)
+
+        with self._lock:
+            self._rebuild_labels()
+        if added or updated or removed:
+            self._save_index()
+        return added, updated, removed
+
+    def hashes(self):
+        """Returns {file name: content hash} for every resume."""
+        with self._lock:
+            return {filename: entry["hash"] for filename, entry in self.entries.items()}
+
+    def labels(self):
+        """Returns the sorted display labels of all resumes."""
+        with self._lock:
+            return sorted(self._labels, key=str.lower)
+
+    def search(self, query):
+        """Returns the sorted labels containing query (case-insensitive)."""
+        query = query.strip().lower()
+        return [label for label in self.labels() if query in label.lower()]
+
+    def file_for_label(self, label):
+        """Returns the file name behind a display label, or None."""
+        with self._lock:
+            return self._labels.get(label)
+
+    def label_for_file(self, filename):
+        """Returns the display label of a file, or None."""
+        with self._lock:
+            return self._label_of.get(filename)
+
+    def path_for(self, filename):
+        """Returns the full path of a resume file."""
+        return os.path.join(self.resumes_dir, filename)
+
+    def _read_entry(self, filename, stat):
+        path = self.path_for(filename)
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            name = str(json.loads(raw).get("name", "Unnamed Resume"))
+        except (OSError, ValueError, AttributeError):
+            raw = b""
+            name = "Error Reading Resume"
+        return {
+            "name": name,
+            "path": path,
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": hashlib.sha256(raw).hexdigest(),
+        }
+
+    def _rebuild_labels(self):
+        counts = {}
+        for entry in self.entries.values():
+            counts[entry["name"]] = counts.get(entry["name"], 0) + 1
+        self._labels = {}
+        for filename, entry in self.entries.items():
+            label = entry["name"] if counts[entry["name"]] == 1 else f"{entry['name']} ({filename})"
+            self._labels[label] = filename
+        # Built from _labels so a file whose label was taken by another maps to None, as before
+        self._label_of = {filename: label for label, filename in self._labels.items()}
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if data.get("version") == CATALOG_VERSION:
+            self.entries = data.get("entries", {})
+            self._rebuild_labels()
+
+    def _save_index(self):
+        with self._lock:
+            data = {"version": CATALOG_VERSION, "entries": dict(self.entries)}
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        tmp_path = f"{self.index_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
@@ -0,0 +1,316 @@
+"""Local embeddings and a persistent vector index of resume experience entries.
+
+Every experience entry of every resume is embedded on the CPU and stored in a
+memory-mapped NumPy array under resumes/.vectors, so the vectors survive
+restarts and are only computed again for entries whose text changed. Rows are
+content-addressed: identical entries in several resumes share one vector.
+
+The default embedder is a hashing-trick bag of words and bigrams, which needs
+nothing beyond NumPy. Set EMBEDDING_MODEL to a sentence-transformers model
+name (e.g. all-MiniLM-L6-v2) to use that instead when the package is
+installed; the index is rebuilt automatically when the embedder changes.
+"""
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+import numpy as np
+
+from prompt import EMBEDDING_MODEL
+from scoring import flatten_text, tokenize
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+# --- Configuration ---
+HASH_EMBEDDING_DIM = 512
+EMBEDDING_BATCH_SIZE = 64
+VECTOR_DIR_NAME = ".vectors"
+VECTOR_INDEX_VERSION = 1
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+class HashingEmbedder:
+    """Embeds text by hashing its words and word pairs into a fixed-size vector.
+
+    Similar texts share terms and so point in similar directions; this is a
+    cheap stand-in for a learned model that still ranks related experience
+    entries well above unrelated ones.
+    """
+
+    def __init__(self, dim=HASH_EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}-v1"
+
+    def embed(self, texts):
+        """Returns an (n, dim) float32 array of L2-normalized vectors."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint32, count=len(features))
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], hashes % self.dim, signs)
+        # Sublinear term frequency so one repeated word does not dominate
+        return _normalize(np.sign(vectors) * np.log1p(np.abs(vectors)))
+
+
+class SentenceTransformerEmbedder:
+    """Embeds text with a local sentence-transformers model."""
+
+    def __init__(self, model_name):
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts):
+        """Returns an (n, dim) float32 array of L2-normalized vectors."""
+        vectors = self.model.encode(list(texts), batch_size=EMBEDDING_BATCH_SIZE, convert_to_numpy=True)
+        return _normalize(vectors.astype(np.float32))
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def get_embedder():
+    """Returns the shared embedder, loading the configured model on first use."""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            if EMBEDDING_MODEL and SentenceTransformer is not None:
+                _embedder = SentenceTransformerEmbedder(EMBEDDING_MODEL)
+            else:
+                _embedder = HashingEmbedder()
+        return _embedder
+
+
+def embed_batched(embedder, texts, batch_size=EMBEDDING_BATCH_SIZE):
+    """Embeds texts in batches and returns one (n, dim) array."""
+    if not texts:
+        return np.zeros((0, embedder.dim), dtype=np.float32)
+    return np.vstack([embedder.embed(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)])
+
+
+def text_key(embedder, text):
+    """Returns the content address of a text's vector for an embedder."""
+    return hashlib.sha256(f"{embedder.name}\n{text}".encode("utf-8")).hexdigest()[:32]
+
+
+def relevance_order(entries, job_description, index=None):
+    """Returns the indexes of entries sorted from most to least similar to job_description.
+
+    Vectors already in `index` (a VectorIndex) are reused; others are
+    embedded on the fly.
+    """
+    if not entries:
+        return []
+    embedder = index.embedder if index is not None else get_embedder()
+    texts = [flatten_text(entry) for entry in entries]
+    vectors = index.vectors_for(texts) if index is not None else embed_batched(embedder, texts)
+    query = embedder.embed([job_description])[0]
+    similarities = vectors @ query
+    return [int(i) for i in np.argsort(-similarities, kind="stable")]
+
+
+class VectorIndex:
+    """A persistent, memory-mapped index of resume experience entry vectors.
+
+    vectors.npy holds one row per distinct entry text; meta.json records
+    which rows are in use, their content keys, and the rows of every resume
+    file with the content hash they were computed from. sync(catalog) embeds
+    only entries of resumes that changed (in batches) and frees the rows of
+    removed ones. Safe to sync from a background thread while other threads
+    search.
+    """
+
+    def __init__(self, directory, embedder=None):
+        self.directory = directory
+        self.embedder = embedder or get_embedder()
+        self.vectors_path = os.path.join(directory, "vectors.npy")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self._lock = threading.Lock()
+        self._vectors = None
+        self.rows = []        # row -> content key, or None if free
+        self.refs = []        # row -> number of resume entries using it
+        self.files = {}       # file name -> {"hash", "rows": [row per experience entry]}
+        self._row_of = {}     # content key -> row
+        self._free = []       # rows available for reuse
+        self._load()
+
+    def sync(self, catalog):
+        """Embeds changed resumes from catalog and returns (updated, removed) file names."""
+        hashes = catalog.hashes()
+        with self._lock:
+            stale = [f for f, h in hashes.items() if self.files.get(f, {}).get("hash") != h]
+            removed = [f for f in self.files if f not in hashes]
+
+        texts_by_file = {}
+        for filename in stale:
+            try:
+                with open(catalog.path_for(filename), 'r') as f:
+                    resume_data = json.load(f)
+            except (OSError, ValueError):  # ValueError covers bad JSON and bad UTF-8
+                continue
+            if not isinstance(resume_data, dict):
+                continue
+            experience = resume_data.get("experience")
+            texts_by_file[filename] = [flatten_text(e) for e in experience] if isinstance(experience, list) else []
+
+        # Embed every text not stored yet in one batched pass, outside the lock
+        with self._lock:
+            missing = {}
+            for texts in texts_by_file.values():
+                for text in texts:
+                    key = text_key(self.embedder, text)
+                    if key not in self._row_of:
+                        missing.setdefault(key, text)
+        vectors = embed_batched(self.embedder, list(missing.values()))
+
+        with self._lock:
+            for key, vector in zip(missing, vectors):
+                if key not in self._row_of:
+                    self._store(key, vector)
+
+            for filename, texts in texts_by_file.items():
+                self._release(filename)
+                rows = [self._row_of[text_key(self.embedder, text)] for text in texts]
+                for row in rows:
+                    self.refs[row] += 1
+                self.files[filename] = {"hash": hashes[filename], "rows": rows}
+            for filename in removed:
+                self._release(filename)
+            if texts_by_file or removed:
+                self._free_unused()
+                self._save()
+        return list(texts_by_file), removed
+
+    def vectors_for(self, texts):
+        """Returns the vectors of texts, embedding the ones that are not stored."""
+        result = np.zeros((len(texts), self.embedder.dim), dtype=np.float32)
+        unknown = []
+        with self._lock:
+            for n, text in enumerate(texts):
+                row = self._row_of.get(text_key(self.embedder, text))
+                if row is None:
+                    unknown.append(n)
+                else:
+                    result[n] = self._vectors[row]
+        if unknown:
+            result[unknown] = embed_batched(self.embedder, [texts[n] for n in unknown])
+        return result
+
+    def search(self, query, top_k=10):
+        """Returns the top_k (file name, experience index, similarity) matches for a query text."""
+        owners, similarities = self._similarities(query)
+        if not owners:
+            return []
+        top_k = min(top_k, len(owners))
+        best = np.argpartition(-similarities, top_k - 1)[:top_k]
+        best = best[np.argsort(-similarities[best], kind="stable")]
+        return [(owners[i][0], owners[i][1], float(similarities[i])) for i in best]
+
+    def file_similarity(self, query):
+        """Returns {file name: best similarity of any experience entry to the query text}."""
+        owners, similarities = self._similarities(query)
+        best = {}
+        for (filename, _), similarity in zip(owners, similarities.tolist()):
+            if similarity > best.get(filename, -1.0):
+                best[filename] = similarity
+        return best
+
+    def _similarities(self, query):
+        """Returns ([(file name, experience index)], cosine similarity of each to the query)."""
+        query_vector = self.embedder.embed([query])[0]
+        with self._lock:
+            owners = [(f, n) for f, info in self.files.items() for n in range(len(info["rows"]))]
+            rows = np.fromiter((row for info in self.files.values() for row in info["rows"]), dtype=np.int64,
+                               count=len(owners))
+            if not owners:
+                return [], np.zeros(0, dtype=np.float32)
+            # One vectorized product over the mapped rows; vectors are unit length
+            return owners, np.asarray(self._vectors[rows] @ query_vector)
+
+    def _store(self, key, vector):
+        if self._free:
+            row = self._free.pop()
+            self.rows[row] = key
+            self.refs[row] = 0
+        else:
+            row = len(self.rows)
+            self._ensure_capacity(row + 1)
+            self.rows.append(key)
+            self.refs.append(0)
+        self._vectors[row] = vector
+        self._row_of[key] = row
+
+    def _release(self, filename):
+        info = self.files.pop(filename, None)
+        if info:
+            for row in info["rows"]:
+                self.refs[row] -= 1
+
+    def _free_unused(self):
+        for row, key in enumerate(self.rows):
+            if key is not None and self.refs[row] <= 0:
+                del self._row_of[key]
+                self.rows[row] = None
+                self.refs[row] = 0
+                self._free.append(row)
+
+    def _ensure_capacity(self, needed):
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        new_capacity = max(needed, capacity * 2, 64)
+        tmp_path = self.vectors_path + ".tmp.npy"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                          shape=(new_capacity, self.embedder.dim))
+        if capacity:
+            grown[:capacity] = self._vectors[:capacity]
+        grown.flush()
+        del grown
+        self._vectors = None  # close the old mapping before replacing its file
+        os.replace(tmp_path, self.vectors_path)
+        self._vectors = np.load(self.vectors_path, mmap_mode="r+")
+
+    def _load(self):
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+            vectors = np.load(self.vectors_path, mmap_mode="r+")
+        except (OSError, ValueError):
+            return
+        if (meta.get("version") != VECTOR_INDEX_VERSION or meta.get("model") != self.embedder.name
+                or vectors.shape[1] != self.embedder.dim or vectors.shape[0] < len(meta.get("rows", []))):
+            return  # built by another embedder: start over
+        self._vectors = vectors
+        self.rows = meta["rows"]
+        self.files = meta["files"]
+        self.refs = [0] * len(self.rows)
+        for info in self.files.values():
+            for row in info["rows"]:
+                self.refs[row] += 1
+        self._row_of = {key: row for row, key in enumerate(self.rows) if key is not None}
+        self._free = [row for row, key in enumerate(self.rows) if key is None]
+
+    def _save(self):
+        if self._vectors is not None:
+            self._vectors.flush()
+        os.makedirs(self.directory, exist_ok=True)
+        meta = {"version": VECTOR_INDEX_VERSION, "model": self.embedder.name, "rows": self.rows, "files": self.files}
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
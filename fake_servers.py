@@ -0,0 +1,375 @@
+"""Local stand-ins for the OpenAI API and the PDF generator.
+
+FakeOpenAIServer answers /v1/chat/completions (plain and streamed) with a
+lightly tailored copy of the resume sections found in the prompt, after a
+configurable latency and at a configurable token rate. It also implements the
+/v1/files and /v1/batches endpoints the Batch API uses: a batch stays
+in_progress for batch_duration seconds and then completes with an output file
+of chat completions for every request line. StubPdfServer answers
+every POST with a PDF of a configurable size. Both run in a background thread
+on a free local port, so benchmarks and manual tests never leave the machine.
+
+Usage:
+    python fake_servers.py openai [--port 8000] [--latency 0.5] [--tokens-per-second 100] [--batch-duration 1]
+    python fake_servers.py pdf [--port 8001] [--latency 0.2] [--size 100000]
+
+Then point the app at them with OPENAI_BASE_URL=http://127.0.0.1:8000/v1 and
+PDF_GENERATOR_ENDPOINT=http://127.0.0.1:8001/.
+"""
+import argparse
+import itertools
+import json
+import re
+import sys
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHARS_PER_TOKEN = 4
+
+
+def _json_after(prompt, marker):
+    """Decodes the JSON value that follows marker in prompt, or returns None."""
+    position = prompt.find(marker)
+    if position == -1:
+        return None
+    text = prompt[position + len(marker):].lstrip()
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text)
+    except json.JSONDecodeError:
+        return None
+    return value
+
+
+def _line_after(prompt, marker):
+    match = re.search(re.escape(marker) + r"[ \t]*(.*)", prompt)
+    return match.group(1).strip() if match else ""
+
+
+def _tailor_entry(entry):
+    if isinstance(entry, dict):
+        entry = dict(entry)
+        entry["description"] = f"{entry.get('description', '')} Delivered results aligned with the role.".strip()
+    return entry
+
+
+def _tailor_skills(skills):
+    if isinstance(skills, list):
+        return skills + ["Benchmarking"]
+    if isinstance(skills, dict):
+        return dict(skills, Tailored=["Benchmarking"])
+    return skills
+
+
+def fake_completion(prompt):
+    """Returns the JSON object a tailoring prompt would plausibly get back."""
+    if "**Experience Entry:**" in prompt:
+        return {"experience": _tailor_entry(_json_after(prompt, "**Experience Entry:**"))}
+    if "**Current Skills:**" in prompt:
+        return {"skills": _tailor_skills(_json_after(prompt, "**Current Skills:**"))}
+    if "**Current Summary:**" in prompt:
+        return {"summary": f"{_line_after(prompt, '**Current Summary:**')} Tailored to the role."}
+    experience = _json_after(prompt, "- **Experience:**") or []
+    return {
+        "summary": f"{_line_after(prompt, '- **Summary:**')} Tailored to the role.",
+        "experience": [_tailor_entry(entry) for entry in experience],
+        "skills": _tailor_skills(_json_after(prompt, "- **Skills:**") or []),
+    }
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients closing idle keep-alive connections is normal here
+        if not isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            super().handle_error(request, client_address)
+
+
+class _Server:
+    """Runs a ThreadingHTTPServer in a daemon thread; usable as a context manager."""
+
+    def __init__(self, handler, port=0):
+        self.httpd = _QuietHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.owner = self
+        self.thread = None
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name=type(self).__name__, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def completion_response(body):
+    """Returns the chat.completion object the fake server answers a request body with."""
+    prompt = body.get("messages", [{}])[-1].get("content", "")
+    content = json.dumps(fake_completion(prompt))
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": len(prompt) // CHARS_PER_TOKEN, "completion_tokens": len(content) // CHARS_PER_TOKEN,
+                  "total_tokens": (len(prompt) + len(content)) // CHARS_PER_TOKEN},
+    }
+
+
+def _parse_multipart(content_type, data):
+    """Returns {field name: (filename, bytes)} for a multipart/form-data body."""
+    message = BytesParser(policy=default_policy).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + data
+    )
+    return {
+        part.get_param("name", header="content-disposition"): (part.get_filename(), part.get_payload(decode=True))
+        for part in message.iter_parts()
+    }
+
+
+class _OpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server.owner
+        server.count_request()
+        data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.endswith("/files"):
+            fields = _parse_multipart(self.headers.get("Content-Type", ""), data)
+            filename, content = fields.get("file", ("upload.jsonl", b""))
+            purpose = fields.get("purpose", (None, b"batch"))[1].decode("utf-8")
+            self._send_json(200, server.add_file(content, filename, purpose))
+            return
+        body = json.loads(data or b"{}")
+        if self.path.endswith("/batches"):
+            if body.get("input_file_id") not in server.files:
+                self._send_json(404, {"error": {"message": f"No such file: {body.get('input_file_id')}"}})
+                return
+            self._send_json(200, server.create_batch(body))
+            return
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        response = completion_response(body)
+        content = response["choices"][0]["message"]["content"]
+        time.sleep(server.latency)
+        if body.get("stream"):
+            self._stream(body, content, server.tokens_per_second)
+            return
+        time.sleep(len(content) / CHARS_PER_TOKEN / server.tokens_per_second)
+        self._send_json(200, response)
+
+    def do_GET(self):
+        server = self.server.owner
+        server.count_request()
+        match = re.search(r"/(files|batches)/([^/]+)(/content)?$", self.path)
+        if match and match.group(1) == "batches" and match.group(2) in server.batches:
+            self._send_json(200, server.batch_status(match.group(2)))
+        elif match and match.group(1) == "files" and match.group(2) in server.files:
+            if match.group(3):
+                self._send_bytes(200, server.files[match.group(2)]["content"], "application/octet-stream")
+            else:
+                self._send_json(200, server.files[match.group(2)]["object"])
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _stream(self, body, content, tokens_per_second):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        delay = 1 / tokens_per_second
+        for start in range(0, len(content), CHARS_PER_TOKEN):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": content[start:start + CHARS_PER_TOKEN]},
+                             "finish_reason": None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            time.sleep(delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, value):
+        self._send_bytes(status, json.dumps(value).encode("utf-8"), "application/json")
+
+    def _send_bytes(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeOpenAIServer(_Server):
+    """A local chat completions and Batch API endpoint with configurable latency and token rate.
+
+    Request lines of a batch whose custom_id is in fail_custom_ids are
+    answered with an error in the batch's error file.
+    """
+
+    def __init__(self, latency=0.2, tokens_per_second=200.0, port=0, batch_duration=1.0, fail_custom_ids=()):
+        super().__init__(_OpenAIHandler, port)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.batch_duration = batch_duration
+        self.fail_custom_ids = set(fail_custom_ids)
+        self.files = {}    # file id -> {"object": file object, "content": bytes}
+        self.batches = {}  # batch id -> batch object
+        self._object_ids = itertools.count(1)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def add_file(self, content, filename, purpose):
+        """Stores an uploaded file and returns its file object."""
+        with self._lock:
+            file_id = f"file-fake{next(self._object_ids)}"
+            self.files[file_id] = {"content": content, "object": {
+                "id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed",
+            }}
+        return self.files[file_id]["object"]
+
+    def create_batch(self, body):
+        """Starts a batch over an uploaded request file and returns its batch object."""
+        lines = [line for line in self.files[body["input_file_id"]]["content"].splitlines() if line.strip()]
+        with self._lock:
+            batch_id = f"batch_fake{next(self._object_ids)}"
+            self.batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": body.get("endpoint"),
+                "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window", "24h"),
+                "status": "in_progress", "created_at": int(time.time()), "in_progress_at": int(time.time()),
+                "output_file_id": None, "error_file_id": None,
+                "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+                "metadata": body.get("metadata"), "_started": time.monotonic(),
+            }
+        return self.batch_status(batch_id)
+
+    def batch_status(self, batch_id):
+        """Returns a batch object, completing the batch once batch_duration has passed."""
+        with self._lock:
+            batch = self.batches[batch_id]
+            if batch["status"] == "in_progress" and time.monotonic() - batch["_started"] >= self.batch_duration:
+                self._complete_batch(batch)
+            return {k: v for k, v in batch.items() if not k.startswith("_")}
+
+    def _complete_batch(self, batch):
+        output, errors = [], []
+        for n, line in enumerate(self.files[batch["input_file_id"]]["content"].splitlines()):
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            custom_id = request.get("custom_id")
+            if custom_id in self.fail_custom_ids:
+                errors.append({"id": f"batch_req_{n}", "custom_id": custom_id, "response": None,
+                               "error": {"code": "server_error", "message": "Simulated failure"}})
+                continue
+            output.append({"id": f"batch_req_{n}", "custom_id": custom_id, "error": None, "response": {
+                "status_code": 200, "request_id": f"req_{n}", "body": completion_response(request.get("body", {})),
+            }})
+        for key, results in (("output_file_id", output), ("error_file_id", errors)):
+            if results:
+                content = "".join(json.dumps(result) + "\n" for result in results).encode("utf-8")
+                file_id = f"file-fake{next(self._object_ids)}"
+                self.files[file_id] = {"content": content, "object": {
+                    "id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                    "filename": f"{batch['id']}_{key[:-8]}.jsonl", "purpose": "batch_output", "status": "processed",
+                }}
+                batch[key] = file_id
+        batch["request_counts"] = {"total": len(output) + len(errors), "completed": len(output), "failed": len(errors)}
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+
+
+class _PdfHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server.owner
+        server.count_request()
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(server.latency)
+        data = b"%PDF-1.4\n" + b"0" * max(0, server.size - 9)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubPdfServer(_Server):
+    """A local PDF generator that returns size bytes after latency seconds."""
+
+    def __init__(self, latency=0.1, size=100_000, port=0):
+        super().__init__(_PdfHandler, port)
+        self.latency = latency
+        self.size = size
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI server or a stub PDF generator.")
+    parser.add_argument("kind", choices=("openai", "pdf"))
+    parser.add_argument("--port", type=int, default=0, help="port to listen on (default: any free port)")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the response starts")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="fake OpenAI generation speed")
+    parser.add_argument("--size", type=int, default=100_000, help="stub PDF size in bytes")
+    parser.add_argument("--batch-duration", type=float, default=1.0, help="seconds a fake batch stays in progress")
+    args = parser.parse_args(argv)
+
+    if args.kind == "openai":
+        server = FakeOpenAIServer(args.latency, args.tokens_per_second, args.port, args.batch_duration).start()
+        print(f"Fake OpenAI API at {server.base_url}", flush=True)
+    else:
+        server = StubPdfServer(args.latency, args.size, args.port).start()
+        print(f"Stub PDF generator at {server.url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
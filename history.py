@@ -0,0 +1,326 @@
+"""Persistent tailoring history in an embedded SQLite database.
+
+Every tailoring run is stored as a compact JSON patch (json_diff.diff without
+the "old" annotations) against the resume it started from. Each distinct base
+resume and job description is stored once, zlib-compressed, and shared by all
+runs that used it. Runs are indexed by resume file and by job description
+hash, so "all versions of this resume" and "all runs against this posting"
+are index lookups, and any version is rebuilt with json_diff.apply_patch,
+which copies only the containers the patch touches.
+
+Usage:
+    python history.py list [--resume FILE] [--job JOB_DESCRIPTION_FILE] [--limit N]
+    python history.py show RUN_ID [--changes]
+    python history.py stats
+    python history.py prune [--keep N]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from cache import CACHE_DIR, hash_key
+from json_diff import apply_patch, diff
+
+# --- Configuration ---
+HISTORY_DB = os.getenv("HISTORY_DB", os.path.join(CACHE_DIR, "history.sqlite3"))
+HISTORY_MAX_RUNS_PER_RESUME = int(os.getenv("HISTORY_MAX_RUNS_PER_RESUME", "200"))  # 0 keeps every run
+HISTORY_DISABLED = os.getenv("HISTORY_DISABLED", "").lower() in ("1", "true", "yes")
+HISTORY_SCHEMA_VERSION = 1
+BASE_CACHE_SIZE = 32  # decoded base resumes kept in memory
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bases (
+    id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    hash TEXT PRIMARY KEY,
+    text BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    resume_file TEXT NOT NULL,
+    base_id INTEGER NOT NULL REFERENCES bases(id),
+    job_hash TEXT NOT NULL REFERENCES jobs(hash),
+    patch BLOB NOT NULL,
+    change_count INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    meta TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_resume ON runs (resume_file, created_at);
+CREATE INDEX IF NOT EXISTS runs_by_job ON runs (job_hash, created_at);
+CREATE INDEX IF NOT EXISTS runs_by_base ON runs (base_id);
+"""
+
+RUN_COLUMNS = "id, resume_file, job_hash, change_count, created_at, meta"
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def _pack(value):
+    return zlib.compress(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def job_description_hash(job_description):
+    """Returns the hash runs against a job description are filed under (whitespace-insensitive)."""
+    return hash_key("job", " ".join(job_description.split()))[:32]
+
+
+def _run_row(row):
+    run_id, resume_file, job_hash, change_count, created_at, meta = row
+    return {
+        "id": run_id,
+        "resume_file": resume_file,
+        "job_hash": job_hash,
+        "change_count": change_count,
+        "created_at": created_at,
+        "meta": json.loads(meta) if meta else {},
+    }
+
+
+class HistoryStore:
+    """A thread-safe SQLite store of tailoring runs.
+
+    record_run() saves one run and returns its id; runs_for_resume() and
+    runs_for_job() list runs newest first (without their contents); version()
+    rebuilds the tailored resume of a run and changes() its display change
+    log. Only the newest max_runs_per_resume runs of each resume are kept,
+    and bases and job descriptions no run refers to are deleted with them.
+    """
+
+    def __init__(self, path=HISTORY_DB, max_runs_per_resume=HISTORY_MAX_RUNS_PER_RESUME):
+        self.path = path
+        self.max_runs_per_resume = max_runs_per_resume
+        self._lock = threading.Lock()
+        self._bases = OrderedDict()  # base id -> decoded resume, least recently used first
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA foreign_keys=ON")
+            version = self._db.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, HISTORY_SCHEMA_VERSION):
+                raise sqlite3.DatabaseError(f"{path} has history schema {version}, expected {HISTORY_SCHEMA_VERSION}")
+            self._db.executescript(SCHEMA)
+            self._db.execute(f"PRAGMA user_version={HISTORY_SCHEMA_VERSION}")
+
+    def record_run(self, resume_file, base_data, modified_data, job_description, meta=None):
+        """Stores one tailoring run and returns its id.
+
+        base_data is the resume the run started from and modified_data the
+        tailored result; only the patch between them is stored per run.
+        meta is any small JSON-serializable dict (model, timings, ...).
+        """
+        patch = diff(base_data, modified_data)
+        base_hash = hash_key(base_data)
+        job_hash = job_description_hash(job_description)
+        with self._lock, self._db:
+            self._db.execute("INSERT OR IGNORE INTO bases (content_hash, data) VALUES (?, ?)",
+                             (base_hash, _pack(base_data)))
+            base_id = self._db.execute("SELECT id FROM bases WHERE content_hash = ?", (base_hash,)).fetchone()[0]
+            self._db.execute("INSERT OR IGNORE INTO jobs (hash, text) VALUES (?, ?)",
+                             (job_hash, _pack(job_description)))
+            run_id = self._db.execute(
+                "INSERT INTO runs (resume_file, base_id, job_hash, patch, change_count, created_at, meta) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (resume_file, base_id, job_hash, _pack(patch), len(patch), time.time(),
+                 json.dumps(meta) if meta else None)
+            ).lastrowid
+            if self.max_runs_per_resume:
+                self._prune_resume(resume_file, self.max_runs_per_resume)
+        return run_id
+
+    def runs_for_resume(self, resume_file, limit=None):
+        """Returns the runs of a resume file, newest first."""
+        return self._runs("WHERE resume_file = ?", (resume_file,), limit)
+
+    def runs_for_job(self, job_description=None, job_hash=None, resume_file=None, limit=None):
+        """Returns the runs against a job description (or its hash), newest first.
+
+        Pass resume_file to only get the runs of that resume.
+        """
+        job_hash = job_hash or job_description_hash(job_description)
+        if resume_file is not None:
+            return self._runs("WHERE job_hash = ? AND resume_file = ?", (job_hash, resume_file), limit)
+        return self._runs("WHERE job_hash = ?", (job_hash,), limit)
+
+    def recent_runs(self, limit=None):
+        """Returns the runs of every resume, newest first."""
+        return self._runs("", (), limit)
+
+    def run(self, run_id):
+        """Returns the listing row of one run, or None."""
+        runs = self._runs("WHERE id = ?", (run_id,), None)
+        return runs[0] if runs else None
+
+    def base(self, run_id):
+        """Returns the resume a run started from. The result is shared: do not modify it."""
+        with self._lock:
+            row = self._db.execute("SELECT base_id FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                raise KeyError(run_id)
+            return self._base(row[0])
+
+    def version(self, run_id):
+        """Returns the tailored resume of a run, rebuilt from its base and patch.
+
+        Parts the patch does not touch are shared with the cached base, so
+        copy the result before modifying it in place.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT base_id, patch FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                raise KeyError(run_id)
+            base = self._base(row[0])
+        return apply_patch(base, _unpack(row[1]))
+
+    def changes(self, run_id):
+        """Returns the change log of a run, with old values for display (see analyzer.compare_resumes)."""
+        return diff(self.base(run_id), self.version(run_id), include_old=True)
+
+    def job_description(self, job_hash):
+        """Returns the job description text stored under a hash, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT text FROM jobs WHERE hash = ?", (job_hash,)).fetchone()
+        return _unpack(row[0]) if row else None
+
+    def delete_run(self, run_id):
+        """Deletes one run, and its base and job description if no other run uses them."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+            self._delete_orphans()
+
+    def prune(self, keep):
+        """Keeps only the newest `keep` runs of every resume and returns how many were deleted."""
+        with self._lock, self._db:
+            files = [row[0] for row in self._db.execute("SELECT DISTINCT resume_file FROM runs")]
+            deleted = sum(self._prune_resume(f, keep) for f in files)
+        return deleted
+
+    def stats(self):
+        """Returns row counts and the stored (compressed) sizes in bytes."""
+        with self._lock:
+            counts = {table: self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in ("runs", "bases", "jobs")}
+            counts["patch_bytes"] = self._db.execute("SELECT COALESCE(SUM(LENGTH(patch)), 0) FROM runs").fetchone()[0]
+            counts["base_bytes"] = self._db.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM bases").fetchone()[0]
+        counts["file_bytes"] = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _runs(self, where, params, limit):
+        query = f"SELECT {RUN_COLUMNS} FROM runs {where} ORDER BY created_at DESC, id DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [_run_row(row) for row in self._db.execute(query, params)]
+
+    def _base(self, base_id):
+        base = self._bases.get(base_id)
+        if base is None:
+            base = _unpack(self._db.execute("SELECT data FROM bases WHERE id = ?", (base_id,)).fetchone()[0])
+            self._bases[base_id] = base
+            if len(self._bases) > BASE_CACHE_SIZE:
+                self._bases.popitem(last=False)
+        else:
+            self._bases.move_to_end(base_id)
+        return base
+
+    def _prune_resume(self, resume_file, keep):
+        deleted = self._db.execute(
+            "DELETE FROM runs WHERE resume_file = ? AND id NOT IN "
+            "(SELECT id FROM runs WHERE resume_file = ? ORDER BY created_at DESC, id DESC LIMIT ?)",
+            (resume_file, resume_file, keep)
+        ).rowcount
+        if deleted:
+            self._delete_orphans()
+        return deleted
+
+    def _delete_orphans(self):
+        orphans = [row[0] for row in self._db.execute(
+            "SELECT id FROM bases WHERE NOT EXISTS (SELECT 1 FROM runs WHERE runs.base_id = bases.id)")]
+        for base_id in orphans:
+            self._bases.pop(base_id, None)
+        self._db.executemany("DELETE FROM bases WHERE id = ?", [(base_id,) for base_id in orphans])
+        self._db.execute("DELETE FROM jobs WHERE NOT EXISTS (SELECT 1 FROM runs WHERE runs.job_hash = jobs.hash)")
+
+
+def get_history():
+    """Returns the shared history store, opening it on first use, or None if HISTORY_DISABLED is set."""
+    global _history
+    if HISTORY_DISABLED:
+        return None
+    with _history_lock:
+        if _history is None:
+            _history = HistoryStore()
+        return _history
+
+
+def _print_runs(runs):
+    for run in runs:
+        created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["created_at"]))
+        print(f"{run['id']:>6}  {created}  {run['resume_file']:<30}  job {run['job_hash'][:12]}  "
+              f"{run['change_count']} changes")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the tailoring history.")
+    parser.add_argument("--db", default=HISTORY_DB, help=f"history database (default: {HISTORY_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="list runs, newest first")
+    list_parser.add_argument("--resume", help="only runs of this resume file name")
+    list_parser.add_argument("--job", help="only runs against the job description in this file")
+    list_parser.add_argument("--limit", type=int, default=50)
+    show_parser = commands.add_parser("show", help="print the tailored resume of a run")
+    show_parser.add_argument("run_id", type=int)
+    show_parser.add_argument("--changes", action="store_true", help="print the change log instead")
+    commands.add_parser("stats", help="print row counts and sizes")
+    prune_parser = commands.add_parser("prune", help="keep only the newest runs of every resume")
+    prune_parser.add_argument("--keep", type=int, default=HISTORY_MAX_RUNS_PER_RESUME or 200)
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.db, max_runs_per_resume=0)
+    try:
+        if args.command == "list":
+            if args.job:
+                with open(args.job, 'r') as f:
+                    runs = store.runs_for_job(f.read(), resume_file=args.resume, limit=args.limit)
+            elif args.resume:
+                runs = store.runs_for_resume(args.resume, limit=args.limit)
+            else:
+                runs = store.recent_runs(limit=args.limit)
+            _print_runs(runs)
+        elif args.command == "show":
+            try:
+                value = store.changes(args.run_id) if args.changes else store.version(args.run_id)
+            except KeyError:
+                print(f"No run {args.run_id}", file=sys.stderr)
+                return 1
+            print(json.dumps(value, indent=4))
+        elif args.command == "stats":
+            for key, value in store.stats().items():
+                print(f"{key}: {value}")
+        elif args.command == "prune":
+            print(f"Deleted {store.prune(args.keep)} runs")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
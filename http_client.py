@@ -0,0 +1,185 @@
+import email.utils
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import metrics
+
+# --- Configuration ---
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+TIMING_HISTORY = 1000
+
+_openai_client = None
+_session = None
+_client_lock = threading.Lock()
+_timings = deque(maxlen=TIMING_HISTORY)
+
+
+# --- Shared clients ---
+
+def get_openai_client():
+    """Returns the shared OpenAI client, creating it on first use.
+
+    The OpenAI SDK keeps its own pooled httpx connection and already retries
+    429/5xx responses with exponential backoff, jitter and Retry-After, so
+    only the timeout and retry count are configured here.
+    """
+    global _openai_client
+    with _client_lock:
+        if _openai_client is None:
+            import openai  # takes most of a second, so only on first use
+            _openai_client = openai.OpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=OPENAI_BASE_URL,
+                timeout=OPENAI_TIMEOUT,
+                max_retries=HTTP_MAX_RETRIES
+            )
+        return _openai_client
+
+
+def get_session():
+    """Returns the shared keep-alive requests.Session, creating it on first use."""
+    global _session
+    with _client_lock:
+        if _session is None:
+            import requests
+            from timed_http import TimedHTTPAdapter
+            _session = requests.Session()
+            adapter = TimedHTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def is_openai_error(error):
+    """Returns True if error is an openai.APIError, without importing openai to check."""
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(error, openai.APIError)
+
+
+# --- Retries and timings ---
+
+def retry_delay(attempt, response=None):
+    """Returns the seconds to wait before retry number attempt (0-based).
+
+    A Retry-After header (seconds or HTTP date) wins; otherwise the delay is
+    exponential backoff with full jitter, capped at HTTP_BACKOFF_MAX.
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(HTTP_BACKOFF_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(retry_after).timestamp()
+        except (TypeError, ValueError):
+            retry_at = None
+        if retry_at is not None:
+            return min(HTTP_BACKOFF_MAX, max(0.0, retry_at - time.time()))
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+def record_timing(name, total, connect=None, ttfb=None, status=None, attempts=1):
+    """Records the timing of one outbound call (all durations in seconds).
+
+    The durations also go to the http_request_seconds histograms in metrics,
+    labelled by call name and phase.
+    """
+    for phase, value in (("connect", connect), ("ttfb", ttfb), ("total", total)):
+        metrics.observe("http_request_seconds", value, call=name, phase=phase)
+    if attempts > 1:
+        metrics.increment("http_retries_total", attempts - 1, call=name)
+    _timings.append({
+        "name": name,
+        "connect": connect,
+        "ttfb": ttfb,
+        "total": total,
+        "status": status,
+        "attempts": attempts,
+        "at": time.time(),
+    })
+
+
+def recent_timings(name=None):
+    """Returns the recorded call timings, oldest first, optionally filtered by name."""
+    return [t for t in list(_timings) if name is None or t["name"] == name]
+
+
+def request_with_retry(method, url, name=None, stream=False, timeout=None, max_retries=None, **kwargs):
+    """Sends a request on the shared session, retrying on 429/5xx and connection errors.
+
+    The body is read before returning unless stream=True, in which case the
+    caller must consume or close the response and then call
+    finish_streamed(response). Connect time, time to first byte (response
+    headers) and total time of the final attempt, including reading the body,
+    are recorded under name (defaults to "<METHOD> <url>").
+    """
+    import requests
+    from timed_http import last_connect_time, reset_connect_time
+
+    session = get_session()
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    max_retries = HTTP_MAX_RETRIES if max_retries is None else max_retries
+    name = name or f"{method.upper()} {url}"
+
+    attempt = 0
+    while True:
+        reset_connect_time()
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, stream=True, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt >= max_retries:
+                raise
+            time.sleep(retry_delay(attempt))
+            attempt += 1
+            continue
+        ttfb = time.perf_counter() - start
+
+        if response.status_code in RETRY_STATUS_CODES and attempt < max_retries:
+            delay = retry_delay(attempt, response)
+            response.content  # drain the error body so the connection is reused
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        response.timing = {
+            "name": name,
+            "start": start,
+            "connect": last_connect_time(),
+            "ttfb": ttfb,
+            "attempts": attempt + 1,
+        }
+        if not stream:
+            response.content  # read the body so the connection goes back to the pool
+            finish_streamed(response)
+        return response
+
+
+def finish_streamed(response):
+    """Records the timing of a request_with_retry response once its body has been read."""
+    timing = response.timing
+    record_timing(
+        timing["name"],
+        total=time.perf_counter() - timing["start"],
+        connect=timing["connect"],
+        ttfb=timing["ttfb"],
+        status=response.status_code,
+        attempts=timing["attempts"]
+    )
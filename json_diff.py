@@ -0,0 +1,349 @@
+"""Structural JSON diff producing JSON-pointer patches.
+
+diff(a, b) walks both documents recursively and returns a list of patch
+operations in the style of RFC 6902:
+
+    {"op": "replace", "path": "/summary", "value": "..."}
+    {"op": "add", "path": "/experience/0", "value": {...}}
+    {"op": "remove", "path": "/skills/AWS/3"}
+    {"op": "move", "from": "/experience/3", "path": "/experience/0"}
+
+Operations are meant to be applied in order (apply_patch(a, diff(a, b)) == b),
+so list indexes in later operations account for earlier ones. Lists are
+aligned with Myers' O((N+M)D) LCS algorithm over item hashes, so inserting one
+experience entry yields a single "add" instead of marking every later entry as
+modified, and an entry that changed position is reported as a "move". Items
+that were replaced in place are diffed recursively. When two lists differ in
+more than MAX_EDIT_DISTANCE items the alignment falls back to positional
+pairing so very different large documents still diff in linear time.
+Moves are placed with Fenwick trees, so even a fully shuffled list of N items
+diffs in O(N log N) past the alignment.
+"""
+import json
+from collections import deque
+
+MAX_EDIT_DISTANCE = 1000
+
+
+def escape_pointer_token(token):
+    """Escapes a key for use as a JSON pointer segment."""
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def unescape_pointer_token(token):
+    """Reverses escape_pointer_token."""
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def split_pointer(path):
+    """Splits a JSON pointer into its unescaped segments."""
+    if not path:
+        return []
+    return [unescape_pointer_token(token) for token in path.split("/")[1:]]
+
+
+def resolve_pointer(doc, path):
+    """Returns the value at a JSON pointer in doc (raises KeyError/IndexError if missing)."""
+    for token in split_pointer(path):
+        doc = doc[int(token)] if isinstance(doc, list) else doc[token]
+    return doc
+
+
+def _item_hash(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return (type(value).__name__, value)
+
+
+def _same(a, b):
+    return type(a) is type(b) and a == b
+
+
+class _Fenwick:
+    """Counts marked positions in 0..size-1, with O(log size) updates and prefix counts."""
+
+    def __init__(self, size):
+        self.tree = [0] * (size + 1)
+
+    def add(self, position, delta):
+        position += 1
+        while position < len(self.tree):
+            self.tree[position] += delta
+            position += position & -position
+
+    def count_below(self, position):
+        """Returns the number of marked positions < position."""
+        total = 0
+        while position > 0:
+            total += self.tree[position]
+            position -= position & -position
+        return total
+
+
+def diff(a, b, include_old=False):
+    """Returns the list of patch operations that turns a into b.
+
+    With include_old=True every operation is annotated for display: replace
+    and remove operations carry the previous value under "old", and every
+    operation carries under "target" the pointer in b where the change is
+    visible (the new value, or the container an item was removed from).
+    Neither is needed to apply the patch.
+    """
+    ops = []
+    _diff_value(a, b, "", "", ops, include_old)
+    return ops
+
+
+def _append(ops, include_old, op, old=None, target=None):
+    if include_old:
+        if op["op"] in ("replace", "remove"):
+            op["old"] = old
+        op["target"] = target
+    ops.append(op)
+
+
+def _diff_value(a, b, path, target, ops, include_old):
+    if isinstance(a, dict) and isinstance(b, dict):
+        _diff_dict(a, b, path, target, ops, include_old)
+    elif isinstance(a, list) and isinstance(b, list):
+        _diff_list(a, b, path, target, ops, include_old)
+    elif not _same(a, b):
+        _append(ops, include_old, {"op": "replace", "path": path, "value": b}, old=a, target=target)
+
+
+def _diff_dict(a, b, path, target, ops, include_old):
+    for key, value in a.items():
+        token = escape_pointer_token(key)
+        if key not in b:
+            _append(ops, include_old, {"op": "remove", "path": f"{path}/{token}"}, old=value, target=target)
+        else:
+            _diff_value(value, b[key], f"{path}/{token}", f"{target}/{token}", ops, include_old)
+    for key, value in b.items():
+        if key not in a:
+            token = escape_pointer_token(key)
+            _append(ops, include_old, {"op": "add", "path": f"{path}/{token}", "value": value},
+                    target=f"{target}/{token}")
+
+
+def _myers_matches(a_hashes, b_hashes, max_d):
+    """Returns the (i, j) index pairs of a longest common subsequence, or None past max_d edits."""
+    n, m = len(a_hashes), len(b_hashes)
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)
+    trace = []
+    for d in range(min(n + m, max_d) + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a_hashes[x] == b_hashes[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m, d)
+    return None
+
+
+def _backtrack(trace, n, m, d_final):
+    matches = []
+    x, y = n, m
+    for d in range(d_final, -1, -1):
+        v = trace[d]  # v[k] is stored at index k + d + 1
+        k = x - y
+        if d == 0:
+            prev_k = 0
+        elif k == -d or (k != d and v[k - 1 + d + 1] < v[k + 1 + d + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[prev_k + d + 1] if d > 0 else 0
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            matches.append((x, y))
+        x, y = prev_x, prev_y
+    matches.reverse()
+    return matches
+
+
+def _align(a_hashes, b_hashes):
+    """Returns matched (i, j) pairs, trimming the common prefix and suffix first."""
+    n, m = len(a_hashes), len(b_hashes)
+    prefix = 0
+    while prefix < n and prefix < m and a_hashes[prefix] == b_hashes[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and suffix < m - prefix and a_hashes[n - 1 - suffix] == b_hashes[m - 1 - suffix]:
+        suffix += 1
+
+    middle = _myers_matches(a_hashes[prefix:n - suffix], b_hashes[prefix:m - suffix], MAX_EDIT_DISTANCE)
+    if middle is None:
+        middle = []  # too different: pair the middle positionally instead
+    return (
+        [(i, i) for i in range(prefix)]
+        + [(i + prefix, j + prefix) for i, j in middle]
+        + [(n - suffix + s, m - suffix + s) for s in range(suffix)]
+    )
+
+
+def _list_script(a, b, a_hashes, b_hashes):
+    """Builds the ordered edit script for a list, pairing moves and in-place modifications."""
+    matches = _align(a_hashes, b_hashes)
+
+    # Unmatched items between consecutive anchors form gaps
+    gaps = []
+    prev_i = prev_j = -1
+    for i, j in matches + [(len(a), len(b))]:
+        gaps.append((list(range(prev_i + 1, i)), list(range(prev_j + 1, j)), (i, j)))
+        prev_i, prev_j = i, j
+
+    # An item deleted in one place and inserted in another is a move
+    deleted_by_hash = {}
+    for dels, _, _ in gaps:
+        for i in dels:
+            deleted_by_hash.setdefault(a_hashes[i], deque()).append(i)
+    move_source_of = {}
+    move_sources = set()
+    for _, ins, _ in gaps:
+        for j in ins:
+            candidates = deleted_by_hash.get(b_hashes[j])
+            if candidates:
+                i = candidates.popleft()
+                move_source_of[j] = i
+                move_sources.add(i)
+
+    script = []
+    for dels, ins, anchor in gaps:
+        plain_dels = [i for i in dels if i not in move_sources]
+        plain_ins = [j for j in ins if j not in move_source_of]
+        paired = min(len(plain_dels), len(plain_ins))
+        paired_dels = set(plain_dels[:paired])
+        paired_ins = set(plain_ins[:paired])
+        di = ii = 0
+        while di < len(dels) or ii < len(ins):
+            if di < len(dels) and dels[di] not in paired_dels:
+                script.append(("delete", dels[di], None))
+                di += 1
+            elif ii < len(ins) and ins[ii] not in paired_ins:
+                j = ins[ii]
+                script.append(("move", move_source_of[j], j) if j in move_source_of else ("insert", None, j))
+                ii += 1
+            else:
+                script.append(("modify", dels[di], ins[ii]))
+                di += 1
+                ii += 1
+        if anchor[0] < len(a):
+            script.append(("equal", anchor[0], anchor[1]))
+    return script, move_sources
+
+
+def _diff_list(a, b, path, target, ops, include_old):
+    a_hashes = [_item_hash(v) for v in a]
+    b_hashes = [_item_hash(v) for v in b]
+    script, move_sources = _list_script(a, b, a_hashes, b_hashes)
+
+    # The evolving list is: placed targets (t of them) interleaved with the
+    # pending move sources, followed by the originals not processed yet. All
+    # pending items sit before the placement point, which is therefore t + P.
+    # Sources are skipped in original order, so an item's rank among the
+    # pending ones is the number of pending originals before it.
+    t = 0
+    front = 0
+    pending = {}                   # original index -> t when it was skipped
+    pending_tree = _Fenwick(len(a))
+    moved_early = set()            # originals moved up before the script reached them
+    moved_early_tree = _Fenwick(len(a))
+
+    for kind, i, j in script:
+        here = t + len(pending)
+        if kind == "equal":
+            front = i + 1
+            t += 1
+        elif kind == "modify":
+            _diff_value(a[i], b[j], f"{path}/{here}", f"{target}/{j}", ops, include_old)
+            front = i + 1
+            t += 1
+        elif kind == "insert":
+            _append(ops, include_old, {"op": "add", "path": f"{path}/{here}", "value": b[j]}, target=f"{target}/{j}")
+            t += 1
+        elif kind == "delete":
+            front = i + 1
+            if i in moved_early:
+                continue
+            if i in move_sources:
+                pending[i] = t
+                pending_tree.add(i, 1)
+                continue
+            _append(ops, include_old, {"op": "remove", "path": f"{path}/{here}"}, old=a[i], target=target)
+        elif kind == "move":
+            if i in pending:
+                source = pending.pop(i) + pending_tree.count_below(i)
+                pending_tree.add(i, -1)
+                destination = t + len(pending)
+            else:
+                skipped = moved_early_tree.count_below(i) - moved_early_tree.count_below(front)
+                source = here + (i - front) - skipped
+                destination = here
+                moved_early.add(i)
+                moved_early_tree.add(i, 1)
+            if source != destination:
+                _append(ops, include_old, {"op": "move", "from": f"{path}/{source}", "path": f"{path}/{destination}"},
+                        target=f"{target}/{j}")
+            t += 1
+
+
+def apply_patch(doc, ops):
+    """Returns a new document with the patch operations applied in order.
+
+    Containers are copied on write along each operation's path only, so
+    applying a small patch to a large document costs roughly the size of the
+    patch, and neither the input document nor the patch values are modified.
+    """
+    root = {"": doc}
+    copied = set()
+
+    def slot(path):
+        """Returns (container, key) for a path, copying the containers leading to it."""
+        holder, key = root, ""
+        for token in split_pointer(path):
+            child = holder[key]
+            if id(child) not in copied:
+                child = child.copy()
+                copied.add(id(child))
+                holder[key] = child
+            holder = child
+            key = token if not isinstance(child, list) or token == "-" else int(token)
+        return holder, key
+
+    def insert(path, value):
+        holder, key = slot(path)
+        if isinstance(holder, list):
+            if key == "-":
+                holder.append(value)
+            else:
+                holder.insert(key, value)
+        else:
+            holder[key] = value
+
+    def remove(path):
+        holder, key = slot(path)
+        return holder.pop(key)
+
+    for op in ops:
+        if op["op"] == "add":
+            insert(op["path"], op["value"])
+        elif op["op"] == "remove":
+            remove(op["path"])
+        elif op["op"] == "replace":
+            holder, key = slot(op["path"])
+            holder[key] = op["value"]
+        elif op["op"] == "move":
+            insert(op["path"], remove(op["from"]))
+        else:
+            raise ValueError(f"Unsupported patch operation: {op['op']}")
+    return root[""]
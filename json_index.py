@@ -0,0 +1,83 @@
+"""Pretty-printing JSON together with a JSON-pointer -> character span index."""
+import json
+from bisect import bisect_right
+
+from json_diff import escape_pointer_token
+
+
+def dumps_with_index(value, indent=4):
+    """Returns (text, index) where text == json.dumps(value, indent=indent).
+
+    index maps the JSON pointer of every value in the document ("" for the
+    root) to its (start, end) character offsets in text, so a changed value
+    can be located without scanning or re-rendering the text.
+    """
+    parts = []
+    index = {}
+    offset = 0
+
+    def write(s):
+        nonlocal offset
+        parts.append(s)
+        offset += len(s)
+
+    def emit(node, path, level):
+        start = offset
+        if isinstance(node, dict) and node:
+            inner = "\n" + " " * (indent * (level + 1))
+            write("{")
+            for n, (key, child) in enumerate(node.items()):
+                write(("," if n else "") + inner + json.dumps(str(key)) + ": ")
+                emit(child, f"{path}/{escape_pointer_token(key)}", level + 1)
+            write("\n" + " " * (indent * level) + "}")
+        elif isinstance(node, list) and node:
+            inner = "\n" + " " * (indent * (level + 1))
+            write("[")
+            for n, child in enumerate(node):
+                write(("," if n else "") + inner)
+                emit(child, f"{path}/{n}", level + 1)
+            write("\n" + " " * (indent * level) + "]")
+        else:
+            write(json.dumps(node))
+        index[path] = (start, offset)
+
+    emit(value, "", 0)
+    return "".join(parts), index
+
+
+class LineIndex:
+    """Converts character offsets in a text to Tk "line.column" indexes."""
+
+    def __init__(self, text):
+        self.line_starts = [0]
+        position = text.find("\n")
+        while position != -1:
+            self.line_starts.append(position + 1)
+            position = text.find("\n", position + 1)
+
+    def tk_index(self, offset):
+        """Returns the Tk text index for a character offset."""
+        line = bisect_right(self.line_starts, offset) - 1
+        return f"{line + 1}.{offset - self.line_starts[line]}"
+
+
+TAG_FOR_OP = {"replace": "modified", "move": "modified", "add": "added", "remove": "removed"}
+
+
+def change_spans(changes_log, index):
+    """Returns (tag, start, end) character spans for the changes of an annotated diff.
+
+    Each change is located through its "target" pointer in index (from
+    dumps_with_index of the modified document). Removed items are marked on
+    the opening bracket of the container they were removed from.
+    """
+    spans = []
+    for change in changes_log:
+        span = index.get(change.get("target"))
+        if span is None:
+            continue
+        start, end = span
+        if change["op"] == "remove":
+            end = start + 1
+        spans.append((TAG_FOR_OP[change["op"]], start, end))
+    return spans
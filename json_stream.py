@@ -0,0 +1,114 @@
+import bisect
+import json
+
+
+class SectionStreamParser:
+    """Incrementally parses a streamed top-level JSON object section by section.
+
+    Feed it text chunks as they arrive; it returns the events that became
+    complete with that chunk:
+
+        ("item", key, index, value)  - element `index` of the array under `key`
+        ("section", key, value)      - the full value under top-level `key`
+
+    Array elements are reported as soon as their closing delimiter arrives,
+    so each `experience` entry shows up before the whole array is done. Only
+    string/bracket state is tracked per character; each completed fragment is
+    decoded once with json.loads, so total work stays linear in the input.
+    Chunks are kept in a list and only the completed fragments are joined,
+    so feeding never copies the text received so far.
+    """
+
+    def __init__(self):
+        self.sections = {}
+        self._chunks = []
+        self._chunk_starts = []  # offset of each chunk in the whole text
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+        self._item_start = None
+        self._item_index = 0
+
+    @property
+    def text(self):
+        """The whole text fed so far."""
+        return "".join(self._chunks)
+
+    def _slice(self, start, end):
+        """Returns text[start:end], joining only the chunks it spans."""
+        first = bisect.bisect_right(self._chunk_starts, start) - 1
+        last = bisect.bisect_right(self._chunk_starts, end - 1) - 1 if end > start else first
+        if first == last:
+            offset = self._chunk_starts[first]
+            return self._chunks[first][start - offset:end - offset]
+        joined = "".join(self._chunks[first:last + 1])
+        offset = self._chunk_starts[first]
+        return joined[start - offset:end - offset]
+
+    def feed(self, chunk):
+        """Consumes a chunk of text and returns the list of newly completed events."""
+        if not chunk:
+            return []
+        base = self._pos
+        self._chunks.append(chunk)
+        self._chunk_starts.append(base)
+        events = []
+
+        for pos, ch in enumerate(chunk, base):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = json.loads(self._slice(self._key_start, pos + 1))
+                        self._key_start = None
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None:
+                    self._key_start = pos
+            elif ch == ":" and self._depth == 1 and self._value_start is None:
+                self._value_start = pos + 1
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._value_start is not None:
+                    self._item_start = pos + 1
+                    self._item_index = 0
+            elif ch in "}]":
+                if ch == "]" and self._depth == 2 and self._item_start is not None:
+                    self._emit_item(self._slice(self._item_start, pos), events)
+                    self._item_start = None
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit_section(self._slice(self._value_start, pos) if self._value_start else "", events)
+            elif ch == ",":
+                if self._depth == 1:
+                    self._emit_section(self._slice(self._value_start, pos), events)
+                elif self._depth == 2 and self._item_start is not None:
+                    self._emit_item(self._slice(self._item_start, pos), events)
+                    self._item_start = pos + 1
+
+        self._pos = base + len(chunk)
+        return events
+
+    def _emit_item(self, fragment, events):
+        if not fragment.strip():
+            return
+        events.append(("item", self._key, self._item_index, json.loads(fragment)))
+        self._item_index += 1
+
+    def _emit_section(self, fragment, events):
+        if self._key is not None and fragment.strip():
+            value = json.loads(fragment)
+            self.sections[self._key] = value
+            events.append(("section", self._key, value))
+        self._key = None
+        self._value_start = None
@@ -0,0 +1,196 @@
+"""A lightweight in-process metrics registry.
+
+Histograms record durations (or token counts) with Prometheus-style
+cumulative buckets plus a window of recent samples for percentiles; counters
+record totals. Both are keyed by name and labels:
+
+    with span("diff"):
+        changes = compare_resumes(original, modified)
+    observe("http_request_seconds", 0.42, call="pdf.generate", phase="ttfb")
+    increment("llm_tokens_total", 812, direction="in")
+
+span(stage) records into the "stage_seconds" histogram with a stage label.
+The registry is thread-safe and exported with to_prometheus() or
+write_jsonl(). profiled() wraps a block in cProfile and saves the stats.
+"""
+import bisect
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# --- Configuration ---
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+RECENT_SAMPLES = 1000
+METRICS_PREFIX = "resume_analyzer_"
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+
+class Histogram:
+    """Bucketed observations with count, sum, min, max and recent samples."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.recent.append(value)
+
+    def percentile(self, pct):
+        """Returns the nearest-rank percentile of the recent samples (0 if none)."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[max(0, min(len(ordered) - 1, -(-pct * len(ordered) // 100) - 1))]
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name, value, buckets=DURATION_BUCKETS, **labels):
+    """Records one observation in the histogram name{labels}."""
+    if value is None:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+
+def increment(name, amount=1, **labels):
+    """Adds amount to the counter name{labels}."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+@contextmanager
+def span(stage, **labels):
+    """Times the enclosed block into stage_seconds{stage=...}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+
+def snapshot():
+    """Returns every metric as a list of dicts, histograms first, sorted by name and labels."""
+    with _lock:
+        histograms = [
+            {
+                "type": "histogram",
+                "name": name,
+                "labels": dict(labels),
+                "count": h.count,
+                "sum": h.sum,
+                "min": h.min,
+                "max": h.max,
+                "p50": h.percentile(50),
+                "p95": h.percentile(95),
+                "p99": h.percentile(99),
+                "buckets": dict(zip([str(b) for b in h.buckets] + ["+Inf"], h.bucket_counts)),
+            }
+            for (name, labels), h in sorted(_histograms.items())
+        ]
+        counters = [
+            {"type": "counter", "name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+    return histograms + counters
+
+
+def reset():
+    """Drops every recorded metric."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _prometheus_name(name):
+    return METRICS_PREFIX + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _prometheus_labels(labels, extra=None):
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def to_prometheus():
+    """Returns every metric in the Prometheus text exposition format."""
+    lines = []
+    typed = set()
+    for metric in snapshot():
+        name = _prometheus_name(metric["name"])
+        if name not in typed:
+            lines.append(f"# TYPE {name} {metric['type']}")
+            typed.add(name)
+        labels = metric["labels"]
+        if metric["type"] == "counter":
+            lines.append(f"{name}{_prometheus_labels(labels)} {metric['value']}")
+            continue
+        cumulative = 0
+        for bound, count in metric["buckets"].items():
+            cumulative += count
+            lines.append(f"{name}_bucket{_prometheus_labels(labels, {'le': bound})} {cumulative}")
+        lines.append(f"{name}_sum{_prometheus_labels(labels)} {metric['sum']}")
+        lines.append(f"{name}_count{_prometheus_labels(labels)} {metric['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_jsonl(path):
+    """Appends one timestamped JSON line per metric to path."""
+    timestamp = time.time()
+    with open(path, 'a') as f:
+        for metric in snapshot():
+            f.write(json.dumps(dict(metric, timestamp=timestamp)) + "\n")
+
+
+@contextmanager
+def profiled(enabled, path):
+    """Runs the enclosed block under cProfile when enabled.
+
+    Saves the raw stats to path (load them with pstats or snakeviz) and the
+    top functions by cumulative time to path + ".txt".
+    """
+    if not enabled:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(30)
+        with open(path + ".txt", 'w') as f:
+            f.write(summary.getvalue())
@@ -0,0 +1,284 @@
+"""Background PDF generation.
+
+Resumes are posted to the PDF generator by a small pool of threads. Each
+response is streamed to a temporary file in chunks and renamed onto a unique
+output path, so a failed or interrupted download never leaves a truncated PDF
+and concurrent jobs never overwrite each other. Generated PDFs are kept in a
+content-addressed cache, so a resume that was rendered before is copied from
+disk instead of being sent to the generator again.
+
+Usage:
+    python pdf_jobs.py TAILORED_DIR [OUTPUT_DIR] [--workers N]
+"""
+import argparse
+import atexit
+import itertools
+import json
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from analyzer import normalize_json
+from cache import CACHE_DIR, DiskCache, hash_key
+from http_client import finish_streamed, request_with_retry
+from metrics import increment, observe, span
+
+load_dotenv()
+
+# --- Configuration ---
+PDF_GENERATOR_ENDPOINT = os.getenv("PDF_GENERATOR_ENDPOINT")
+PDF_OUTPUT_DIR = os.getenv("PDF_OUTPUT_DIR", "pdfs")
+PDF_CONCURRENCY = int(os.getenv("PDF_CONCURRENCY", "2"))
+PDF_CHUNK_SIZE = 64 * 1024
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+PDF_CACHE_BYPASS = os.getenv("PDF_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+_pdf_cache = None
+_pdf_cache_lock = threading.Lock()
+
+
+def endpoint_configured(endpoint=PDF_GENERATOR_ENDPOINT):
+    """Returns True if a PDF generator endpoint has been set."""
+    return bool(endpoint) and endpoint != "YOUR_PDF_GENERATOR_ENDPOINT"
+
+
+def get_pdf_cache():
+    """Returns the shared on-disk PDF cache, creating it on first use."""
+    global _pdf_cache
+    with _pdf_cache_lock:
+        if _pdf_cache is None:
+            _pdf_cache = DiskCache(os.path.join(CACHE_DIR, "pdfs"), max_bytes=PDF_CACHE_MAX_BYTES, suffix=".pdf")
+            atexit.register(_pdf_cache.flush)
+        return _pdf_cache
+
+
+def pdf_cache_key(resume_data, endpoint=PDF_GENERATOR_ENDPOINT):
+    """Returns the cache key of the PDF for a resume (sorted keys, whitespace collapsed)."""
+    return hash_key("pdf", normalize_json(resume_data), endpoint)
+
+
+def pdf_filename(resume_data):
+    """Returns the default PDF file name for a resume, e.g. Jane_Doe_Resume.pdf."""
+    parts = str(resume_data.get("name") or "Unnamed").split()
+    return f"{parts[0]}_{parts[-1]}_Resume.pdf" if parts else "Resume.pdf"
+
+
+def reserve_path(output_dir, filename):
+    """Creates and returns an unused path for filename in output_dir.
+
+    "Name.pdf" becomes "Name (2).pdf", "Name (3).pdf", ... when taken. The
+    file is created empty with O_EXCL so concurrent jobs never pick the same
+    path; the finished download replaces it.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stem, ext = os.path.splitext(filename)
+    for n in itertools.count(1):
+        path = os.path.join(output_dir, filename if n == 1 else f"{stem} ({n}){ext}")
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            continue
+
+
+def download_pdf(resume_data, save_path, endpoint=PDF_GENERATOR_ENDPOINT, chunk_size=PDF_CHUNK_SIZE):
+    """Posts resume_data to the PDF generator and streams the PDF to save_path.
+
+    The body is written to a temporary file next to save_path, which is
+    renamed into place only after the whole response has been read. Returns
+    the number of bytes written.
+    """
+    tmp_path = f"{save_path}.{threading.get_ident()}.part"
+    response = request_with_retry("POST", endpoint, name="pdf.generate", stream=True, json=resume_data)
+    try:
+        response.raise_for_status()
+        size = 0
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, save_path)
+        return size
+    finally:
+        finish_streamed(response)  # total includes streaming the body, even if it failed midway
+        response.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def copy_file(source_path, save_path):
+    """Copies source_path to save_path through a temporary file and a rename."""
+    tmp_path = f"{save_path}.{threading.get_ident()}.part"
+    try:
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, save_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def generate_pdf(resume_data, save_path, endpoint=PDF_GENERATOR_ENDPOINT, use_cache=True):
+    """Writes the PDF for resume_data to save_path, from the cache when possible.
+
+    Returns (size in bytes, True if the PDF came from the cache).
+    """
+    use_cache = use_cache and not PDF_CACHE_BYPASS
+    cache = get_pdf_cache() if use_cache else None
+    key = pdf_cache_key(resume_data, endpoint) if cache else None
+    cached_path = cache.get_path(key) if cache else None
+    if cached_path is not None:
+        try:
+            copy_file(cached_path, save_path)
+            return os.path.getsize(save_path), True
+        except FileNotFoundError:
+            pass  # evicted between the lookup and the copy
+
+    with span("pdf_request"):
+        size = download_pdf(resume_data, save_path, endpoint)
+    if cache:
+        cache.put_file(key, save_path)
+    return size, False
+
+
+def list_tailored_resumes(directory):
+    """Returns the sorted tailored resume paths in directory, skipping change logs."""
+    return sorted(
+        os.path.join(directory, f) for f in os.listdir(directory)
+        if f.endswith(".json") and not f.endswith(".changes.json")
+    )
+
+
+class PdfJobQueue:
+    """Generates PDFs on a bounded pool of background threads.
+
+    Jobs are plain dicts like AnalysisWorker's. Progress is reported through
+    the `events` queue, which the Tk main loop drains with root.after:
+
+        ("started", job, None)
+        ("done", job, path)
+        ("error", job, exception)
+
+    Every finished job carries "latency" (seconds from start to the PDF being
+    on disk), "size" in bytes and "cached" (True if no request was made).
+    """
+
+    def __init__(self, endpoint=PDF_GENERATOR_ENDPOINT, max_workers=PDF_CONCURRENCY, use_cache=True):
+        self.endpoint = endpoint
+        self.use_cache = use_cache
+        self.events = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="pdf")
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+
+    def submit(self, resume_data, output_dir=PDF_OUTPUT_DIR, filename=None, batch=None):
+        """Queues a PDF for resume_data and returns the job dict."""
+        job = {
+            "id": next(self._ids),
+            "resume_data": resume_data,
+            "output_dir": output_dir,
+            "filename": filename or pdf_filename(resume_data),
+            "batch": batch,
+            "submitted_at": time.perf_counter(),
+        }
+        with self._lock:
+            self._queued += 1
+        self._executor.submit(self._run, job)
+        return job
+
+    def submit_directory(self, directory, output_dir=None):
+        """Queues a PDF for every tailored resume in directory and returns the jobs.
+
+        PDFs are written to output_dir (defaults to directory) and named after
+        the resume file. Resumes that cannot be read are skipped.
+        """
+        output_dir = output_dir or directory
+        batch = {"total": 0, "finished": 0, "failed": 0}
+        jobs = []
+        for path in list_tailored_resumes(directory):
+            try:
+                with open(path, 'r') as f:
+                    resume_data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            filename = f"{os.path.splitext(os.path.basename(path))[0]}.pdf"
+            batch["total"] += 1
+            jobs.append(self.submit(resume_data, output_dir, filename, batch))
+        return jobs
+
+    def status(self):
+        """Returns (in_flight, queued) job counts."""
+        with self._lock:
+            return self._in_flight, self._queued
+
+    def shutdown(self, wait=True):
+        """Stops accepting jobs, optionally waiting for the queued ones."""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job):
+        with self._lock:
+            self._queued -= 1
+            self._in_flight += 1
+        self.events.put(("started", job, None))
+        start = time.perf_counter()
+        observe("queue_wait_seconds", start - job["submitted_at"], queue="pdf")
+        result = None
+        save_path = None
+        try:
+            save_path = reserve_path(job["output_dir"], job["filename"])
+            job["size"], job["cached"] = generate_pdf(job["resume_data"], save_path, self.endpoint, self.use_cache)
+            result = ("done", job, save_path)
+        except Exception as e:
+            # Any failure, not just HTTP and file errors, must reach the UI as an error event
+            if save_path and os.path.exists(save_path) and os.path.getsize(save_path) == 0:
+                os.remove(save_path)  # release the reserved name
+            result = ("error", job, e)
+        finally:
+            job["latency"] = time.perf_counter() - start
+            with self._lock:
+                self._in_flight -= 1
+                if job["batch"] is not None:
+                    job["batch"]["finished"] += 1
+                    job["batch"]["failed"] += result is None or result[0] == "error"
+        increment("pdf_jobs_total", result="cached" if job.get("cached") else result[0])
+        self.events.put(result)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a PDF for every tailored resume in a directory.")
+    parser.add_argument("tailored_dir", help="directory of tailored resume JSON files")
+    parser.add_argument("output_dir", nargs="?", help="directory for the PDFs (defaults to tailored_dir)")
+    parser.add_argument("--workers", type=int, default=PDF_CONCURRENCY, help="number of concurrent requests")
+    parser.add_argument("--no-cache", action="store_true", help="always call the PDF generator")
+    args = parser.parse_args(argv)
+
+    if not endpoint_configured():
+        print("Error: PDF_GENERATOR_ENDPOINT is not configured.", file=sys.stderr)
+        return 1
+
+    pdf_queue = PdfJobQueue(max_workers=args.workers, use_cache=not args.no_cache)
+    started = time.perf_counter()
+    jobs = pdf_queue.submit_directory(args.tailored_dir, args.output_dir)
+    failed = 0
+    for _ in range(len(jobs)):
+        kind, job, payload = pdf_queue.events.get()
+        while kind == "started":
+            kind, job, payload = pdf_queue.events.get()
+        failed += kind == "error"
+        status = f"FAILED: {payload}" if kind == "error" else payload + (" (cached)" if job["cached"] else "")
+        print(f"{job['filename']}: {status} ({job['latency']:.2f}s)", flush=True)
+    pdf_queue.shutdown()
+
+    print(f"\n{len(jobs) - failed}/{len(jobs)} PDFs generated in {time.perf_counter() - started:.2f}s")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""Token-budgeted prompt compaction.
+
+Job descriptions copied from job boards carry HTML, boilerplate and repeated
+lines, and indented JSON spends tokens on whitespace. compact_prompt() cleans
+both up and, when the prompt is still over PROMPT_TOKEN_BUDGET tokens, drops
+the content least likely to matter: boilerplate job description lines first,
+then lines with fewer than LOW_VALUE_LINE_KEYWORDS keywords, then the least
+relevant (by default the oldest) experience entries, then the remaining job
+description lines with the fewest keywords. If even that is not enough, the
+report says so (over_budget). Token counts are measured locally with tiktoken
+when it is installed and estimated otherwise.
+"""
+import functools
+import html
+import json
+import math
+import os
+import re
+import textwrap
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# --- Configuration ---
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))  # 0 disables dropping content
+PROMPT_MAX_EXPERIENCE = int(os.getenv("PROMPT_MAX_EXPERIENCE", "0"))  # 0 sends every entry that fits
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "")  # ranks experience entries, see embeddings.py
+MIN_EXPERIENCE_ENTRIES = 1
+LOW_VALUE_LINE_KEYWORDS = 3  # job description lines with fewer keywords go before experience entries
+
+
+BOILERPLATE_PATTERNS = re.compile(
+    r"equal opportunity|equal employment|affirmative action|regardless of (race|gender|age)|"
+    r"reasonable accommodation|privacy (policy|notice)|cookie|apply (now|today|here)|click here|"
+    r"share this job|follow us|all rights reserved|©|background check|e-?verify",
+    re.IGNORECASE
+)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their this to we "
+    "will with you your who what which us they them all any can may must should about into over more".split()
+)
+
+PROMPT_TEMPLATE = textwrap.dedent("""\
+    You are an expert resume writer. Your task is to tailor a candidate's resume to perfectly match a job description.
+    Analyze the provided job description and the candidate's resume sections (summary, experience, and skills).
+    Modify the resume sections to align 100% with the job description, add value, and incorporate keywords to make the candidate a top applicant.
+
+    **Job Description:**
+    {job_description}
+
+    **Candidate's Current Resume Sections:**
+    - **Summary:** {summary}
+    - **Experience:** {experience}
+    - **Skills:** {skills}
+
+    **Instructions:**
+    1. **Rewrite the Summary:** Make it concise and impactful, directly addressing the key requirements of the job.
+    2. **Enhance Experience:** Do not remove existing experience. Add quantifiable achievements and responsibilities that align with the job description. If the job requires a skill the candidate has but isn't highlighted, emphasize it.
+    3. **Expand Skills:** Add any skills from the job description that are missing from the candidate's skills list. Ensure the final list is comprehensive.
+
+    Return a JSON object with the updated "summary", "experience", and "skills" sections. Do not include any other text or explanations.
+    The JSON output should look like this:
+    {{"summary": "A new, rewritten summary.", "experience": [{{ ... updated experience ... }}], "skills": [{{ ... updated skills ... }}]}}
+    """)
+
+_APPROX_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\w\s]|\s{2,}|\n")
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model):
+    """Returns the tiktoken encoding for model, or None to fall back to the estimate."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        try:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            return None  # encoding files unavailable offline
+
+
+def count_tokens(text, model="gpt-4o-mini"):
+    """Returns the number of tokens in text for model.
+
+    Uses tiktoken when it is installed and its encoding is available locally;
+    otherwise estimates: every word costs one token per 4 characters, every
+    punctuation mark and every run of indentation or newline costs one.
+    """
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return sum(
+        math.ceil(len(match) / 4) if match[0].isalnum() else 1
+        for match in _APPROX_TOKEN_RE.findall(text)
+    )
+
+
+def compact_json(value):
+    """Serializes a JSON value without indentation or padding."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def clean_job_description(text):
+    """Strips HTML, collapses whitespace and drops blank and repeated lines."""
+    text = re.sub(r"(?is)<(script|style)\b.*?</\1>", " ", text)
+    text = re.sub(r"(?i)<br\s*/?>|</(p|div|li|h[1-6]|tr)>", "\n", text)
+    text = html.unescape(re.sub(r"<[^>]+>", " ", text))
+    lines = []
+    seen = set()
+    for line in text.splitlines():
+        line = re.sub(r"\s+", " ", line).strip(" \t-*•·")
+        key = line.lower()
+        if line and key not in seen:
+            seen.add(key)
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def line_value(line):
+    """Scores a job description line by its distinct keywords (0 for boilerplate)."""
+    if BOILERPLATE_PATTERNS.search(line):
+        return 0
+    words = {w for w in re.findall(r"[a-z0-9+#.]+", line.lower()) if len(w) > 1 and w not in STOPWORDS}
+    return len(words)
+
+
+def render_prompt(summary, experience, skills, job_description):
+    """Renders the tailoring prompt with compact JSON and no template indentation."""
+    return PROMPT_TEMPLATE.format(
+        job_description=job_description,
+        summary=re.sub(r"\s+", " ", str(summary)).strip(),
+        experience=compact_json(experience),
+        skills=compact_json(skills)
+    )
+
+
+def compact_prompt(summary, experience, skills, job_description, original_prompt, budget=PROMPT_TOKEN_BUDGET,
+                   model="gpt-4o-mini", drop_order=None, max_experience=PROMPT_MAX_EXPERIENCE):
+    """Builds a compacted tailoring prompt and reports what it saved.
+
+    drop_order lists experience indexes from least to most worth sending
+    (defaults to the oldest entry first, as resumes list the most recent
+    position first), or is a callable returning that list, which is only
+    called if an entry has to be dropped. At most max_experience entries are
+    sent when it is positive, and more are dropped in that order while over
+    budget.
+
+    Returns (prompt, report). Only the experience entries listed in
+    report["experience_indexes"] are included in the prompt, in their
+    original order; the caller must keep the others unchanged. report also
+    holds the token counts of original_prompt and of the compacted prompt,
+    the budget, the number of job description lines and experience entries
+    that were dropped, and over_budget, True when the prompt is still over
+    a positive budget after dropping everything it may.
+    """
+    lines = clean_job_description(job_description).splitlines()
+    kept_lines = set(range(len(lines)))
+    if drop_order is None:
+        drop_order = list(range(len(experience) - 1, -1, -1))
+    pending = None  # drop_order, resolved on first use
+
+    def next_drop():
+        nonlocal pending
+        if pending is None:
+            pending = list(drop_order() if callable(drop_order) else drop_order)
+        return pending.pop(0) if pending else None
+
+    sent = set(range(len(experience)))
+    while max_experience > 0 and len(sent) > max(max_experience, MIN_EXPERIENCE_ENTRIES):
+        i = next_drop()
+        if i is None:
+            break
+        sent.discard(i)
+
+    def render():
+        jd = "\n".join(lines[i] for i in sorted(kept_lines))
+        return render_prompt(summary, [experience[i] for i in sorted(sent)], skills, jd)
+
+    prompt = render()
+    tokens = count_tokens(prompt, model)
+
+    if budget > 0 and tokens > budget:
+        line_tokens = [count_tokens(line, model) + 1 for line in lines]
+        values = [line_value(line) for line in lines]
+
+        def drop_lines(candidates):
+            nonlocal tokens
+            # Lowest value first; among equals, later lines go first
+            for i in sorted(candidates, key=lambda i: (values[i], -i)):
+                if tokens <= budget:
+                    break
+                kept_lines.discard(i)
+                tokens -= line_tokens[i]
+
+        drop_lines([i for i in kept_lines if values[i] == 0])
+        drop_lines([i for i in kept_lines if values[i] < LOW_VALUE_LINE_KEYWORDS and i > 0])
+        while tokens > budget and len(sent) > MIN_EXPERIENCE_ENTRIES:
+            i = next_drop()
+            if i is None:
+                break
+            if i in sent:
+                sent.discard(i)
+                tokens -= count_tokens(compact_json(experience[i]), model) + 1
+        drop_lines([i for i in kept_lines if i > 0])  # always keep the first (usually the title) line
+
+        prompt = render()
+        tokens = count_tokens(prompt, model)
+
+    return prompt, {
+        "tokens_before": count_tokens(original_prompt, model),
+        "tokens_after": tokens,
+        "budget": budget,
+        "dropped_job_lines": len(lines) - len(kept_lines),
+        "dropped_experience": len(experience) - len(sent),
+        "experience_indexes": sorted(sent),
+        "over_budget": budget > 0 and tokens > budget,
+        "tokenizer": "tiktoken" if _get_encoding(model) is not None else "estimate",
+    }
@@ -0,0 +1,146 @@
+"""Section-sharded tailoring.
+
+Instead of one long completion that regenerates the whole resume, the
+summary, every experience entry and the skills are tailored by independent,
+smaller requests that run concurrently. Wall-clock time is roughly that of
+the slowest shard, and a failed shard only keeps its original section.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from analyzer import (
+    OPENAI_MODEL, PROMPT_VERSION, RESPONSE_CACHE_BYPASS, AnalysisCancelled, AnalysisError, check_api_key,
+    get_response_cache, normalize_json, request_json_completion
+)
+from cache import hash_key
+from http_client import get_openai_client
+from prompt import clean_job_description, compact_json
+
+# --- Configuration ---
+SHARD_CONCURRENCY = int(os.getenv("SHARD_CONCURRENCY", "4"))
+
+
+def build_summary_prompt(summary, job_description):
+    """Builds the prompt that tailors only the summary."""
+    return f"""
+            You are an expert resume writer. Rewrite the candidate's resume summary so it matches the job description.
+            Make it concise and impactful, directly addressing the key requirements of the job.
+
+            **Job Description:**
+            {job_description}
+
+            **Current Summary:** {summary}
+
+            Return a JSON object of the form {{"summary": "A new, rewritten summary."}} and nothing else.
+            """
+
+
+def build_experience_prompt(entry, job_description):
+    """Builds the prompt that tailors a single experience entry."""
+    return f"""
+            You are an expert resume writer. Tailor one entry of the candidate's work experience to the job description.
+            Keep every field of the entry and do not remove existing content. Add quantifiable achievements and responsibilities
+            that align with the job description, emphasizing skills the job requires that the candidate already has.
+
+            **Job Description:**
+            {job_description}
+
+            **Experience Entry:** {compact_json(entry)}
+
+            Return a JSON object of the form {{"experience": {{ ... updated entry with the same fields ... }}}} and nothing else.
+            """
+
+
+def build_skills_prompt(skills, job_description):
+    """Builds the prompt that tailors only the skills."""
+    return f"""
+            You are an expert resume writer. Expand the candidate's skills to match the job description.
+            Add any skills from the job description that are missing, keeping the existing structure of the skills section.
+
+            **Job Description:**
+            {job_description}
+
+            **Current Skills:** {compact_json(skills)}
+
+            Return a JSON object of the form {{"skills": ... updated skills ... }} and nothing else.
+            """
+
+
+def _run_shard(client, name, section, prompt, cache_key, expected_type, cancelled):
+    """Runs one shard (or serves it from the cache) and returns its section value."""
+    if cancelled is not None and cancelled.is_set():
+        raise AnalysisCancelled("Analysis was cancelled.")
+
+    cache = get_response_cache() if cache_key else None
+    result = cache.get_json(cache_key) if cache else None
+    if result is not None:
+        return result[section]
+
+    result = request_json_completion(client, prompt, name=f"openai.shard.{section}")
+    value = result.get(section)
+    if not isinstance(value, expected_type):
+        raise AnalysisError(f"Shard {name} returned no valid \"{section}\".")
+    if cache:
+        cache.put_json(cache_key, result)
+    return value
+
+
+def analyze_resume_sharded(summary, experience, skills, job_description, client=None, use_cache=True,
+                           on_section=None, cancelled=None, max_workers=SHARD_CONCURRENCY):
+    """Tailors the summary, each experience entry and the skills with concurrent requests.
+
+    At most max_workers shards run at once. Each shard is cached on its own,
+    so editing one experience entry only re-runs that entry. on_section, if
+    given, receives the same events as a streamed analyze_resume as each shard
+    finishes (experience items may arrive out of order).
+
+    Returns (modified_sections, failures) where failures maps the name of
+    every failed shard to its error; failed shards keep the original section.
+    Raises AnalysisCancelled if `cancelled` is set before all shards finish.
+    """
+    check_api_key()
+    if client is None:
+        client = get_openai_client()
+    use_cache = use_cache and not RESPONSE_CACHE_BYPASS
+    jd_key = normalize_json(job_description)
+    job_description = clean_job_description(job_description)
+
+    def key(*parts):
+        return hash_key("shard", *parts, jd_key, OPENAI_MODEL, PROMPT_VERSION) if use_cache else None
+
+    shards = [("summary", "summary", None, build_summary_prompt(summary, job_description),
+               key("summary", normalize_json(summary)), str)]
+    for i, entry in enumerate(experience):
+        shards.append((f"experience[{i}]", "experience", i, build_experience_prompt(entry, job_description),
+                       key("experience", normalize_json(entry)), dict))
+    shards.append(("skills", "skills", None, build_skills_prompt(skills, job_description),
+                   key("skills", normalize_json(skills)), (list, dict)))
+
+    modified_sections = {"summary": summary, "experience": list(experience), "skills": skills}
+    failures = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(_run_shard, client, name, section, prompt, cache_key, expected_type, cancelled):
+                (name, section, index)
+            for name, section, index, prompt, cache_key, expected_type in shards
+        }
+        for future in as_completed(futures):
+            name, section, index = futures[future]
+            try:
+                value = future.result()
+            except Exception as e:
+                failures[name] = e
+                continue
+            if index is None:
+                modified_sections[section] = value
+                event = ("section", section, value)
+            else:
+                modified_sections["experience"][index] = value
+                event = ("item", section, index, value)
+            if on_section:
+                on_section(event)
+
+    if cancelled is not None and cancelled.is_set():
+        raise AnalysisCancelled("Analysis was cancelled.")
+    return modified_sections, failures
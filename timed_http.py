@@ -0,0 +1,60 @@
+"""A requests transport adapter whose pooled connections report how long connecting took.
+
+Kept apart from http_client so that requests and urllib3 are only imported
+when the first HTTP request is sent, not at application start.
+
+urllib3 connects lazily on the calling thread, so a thread-local is enough to
+hand the TCP (+TLS) connect time of the current request back to the caller.
+Requests served from a kept-alive connection report a connect time of 0.
+"""
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+_local = threading.local()
+
+
+def reset_connect_time():
+    """Forgets the connect time measured for the previous request on this thread."""
+    _local.connect_time = 0.0
+
+
+def last_connect_time():
+    """Returns the connect time of the latest request on this thread (0 if the connection was reused)."""
+    return getattr(_local, "connect_time", 0.0)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _local.connect_time = time.perf_counter() - start
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _local.connect_time = time.perf_counter() - start
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections report how long connecting took."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
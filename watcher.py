@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+import traceback
+
+# --- Configuration ---
+WATCH_INTERVAL = float(os.getenv("RESUME_WATCH_INTERVAL", "1.0"))
+WATCH_DEBOUNCE = float(os.getenv("RESUME_WATCH_DEBOUNCE", "0.5"))
+
+
+def snapshot(directory, suffix=".json"):
+    """Returns {file name: (mtime_ns, size)} for the matching files in directory."""
+    try:
+        with os.scandir(directory) as it:
+            return {
+                e.name: (e.stat().st_mtime_ns, e.stat().st_size)
+                for e in it if e.is_file() and e.name.endswith(suffix)
+            }
+    except FileNotFoundError:
+        return {}
+
+
+class DirectoryWatcher:
+    """Polls a directory's mtimes and reports changed files in debounced batches.
+
+    Only directory entries are stat'ed on each poll; file contents are never
+    read here. Changes are collected until the directory has been quiet for
+    `debounce` seconds, so an editor's burst of writes is reported once, and
+    on_change(file_names) is then called on the watcher thread with every
+    file that was added, modified or removed. If on_change raises, the
+    traceback is printed and on_error(exception), if given, is called on the
+    watcher thread; watching continues either way.
+    """
+
+    def __init__(self, directory, on_change, interval=WATCH_INTERVAL, debounce=WATCH_DEBOUNCE, suffix=".json",
+                 on_error=None):
+        self.directory = directory
+        self.on_change = on_change
+        self.on_error = on_error
+        self.interval = interval
+        self.debounce = debounce
+        self.suffix = suffix
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Takes the initial snapshot and starts polling in a daemon thread."""
+        self._previous = snapshot(self.directory, self.suffix)
+        self._thread = threading.Thread(target=self._run, name="resume-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops polling."""
+        self._stop.set()
+
+    def _run(self):
+        pending = set()
+        last_change = 0.0
+        while not self._stop.wait(self.interval if not pending else min(self.interval, self.debounce)):
+            current = snapshot(self.directory, self.suffix)
+            changed = {
+                name for name in current.keys() | self._previous.keys()
+                if current.get(name) != self._previous.get(name)
+            }
+            self._previous = current
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+            elif pending and time.monotonic() - last_change >= self.debounce:
+                batch, pending = pending, set()
+                try:
+                    self.on_change(batch)
+                except Exception as e:
+                    # Keep watching even if one batch could not be handled
+                    traceback.print_exc()
+                    if self.on_error:
+                        self.on_error(e)
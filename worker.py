@@ -0,0 +1,82 @@
+import itertools
+import queue
+import threading
+from collections import deque
+
+
+class AnalysisWorker:
+    """Runs queued jobs one at a time on a background thread.
+
+    Jobs are plain dicts. The worker adds an "id" and a "cancelled" event to
+    each submitted job and reports back through the `events` queue, which the
+    Tk main loop drains with root.after:
+
+        ("started", job, None)
+        ("progress", job, payload)
+        ("done", job, result)
+        ("error", job, exception)
+        ("cancelled", job, None)
+
+    run_job(job, report_progress) does the actual work on the worker thread and
+    must not touch Tk widgets; it may call report_progress(payload) and should
+    check job["cancelled"] between slow steps.
+    """
+
+    def __init__(self, run_job):
+        self.run_job = run_job
+        self.events = queue.Queue()
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._ids = itertools.count(1)
+        self._current = None
+        self._thread = threading.Thread(target=self._run, name="analysis-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, job):
+        """Queues a job and returns its id."""
+        job["id"] = next(self._ids)
+        job["cancelled"] = threading.Event()
+        with self._condition:
+            self._pending.append(job)
+            self._condition.notify()
+        return job["id"]
+
+    def cancel_all(self):
+        """Cancels the running job and drops every queued one."""
+        with self._condition:
+            dropped = list(self._pending)
+            self._pending.clear()
+            if self._current is not None:
+                self._current["cancelled"].set()
+        for job in dropped:
+            job["cancelled"].set()
+            self.events.put(("cancelled", job, None))
+
+    def status(self):
+        """Returns (running, queued) job counts."""
+        with self._condition:
+            return (1 if self._current is not None else 0), len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                job = self._current = self._pending.popleft()
+
+            self.events.put(("started", job, None))
+            try:
+                result = self.run_job(job, lambda payload: self.events.put(("progress", job, payload)))
+            except Exception as e:
+                result, error = None, e
+            else:
+                error = None
+
+            with self._condition:
+                self._current = None
+            if job["cancelled"].is_set():
+                self.events.put(("cancelled", job, None))
+            elif error is not None:
+                self.events.put(("error", job, error))
+            else:
+                self.events.put(("done", job, result))